@@ -0,0 +1,294 @@
+import argparse
+import sys
+import time
+from functools import lru_cache
+from enemy import Enemy
+from spawns import enemy_abilities as spawn_abilities
+from effects import default_rules
+from battle import ability_chance
+from events import bus, NullSink
+from registry import registry
+from simulation import make_character
+
+# Effects in the order tracked by the DP state, each as (stacks, duration).
+effect_names = default_rules.names
+no_effects = ((0, 0),) * len(effect_names)
+no_counts = (0,) * len(effect_names)
+
+# Registry enemy abilities as (level coefficient, roll low, roll high, applied effect).
+enemy_abilities = {
+    name: (ability.level_coefficient, ability.low, ability.high, ability.status_effect)
+    for name, ability in registry.enemy_abilities.items()
+}
+
+def uniform(low, high):
+    p = 1 / (high - low + 1)
+    return {value: p for value in range(low, high + 1)}
+
+def shift(dist, offset):
+    return {value + offset: p for value, p in dist.items()}
+
+def scale(dist, factor):
+    return {value * factor: p for value, p in dist.items()}
+
+def mix(*weighted):
+    result = {}
+    for weight, dist in weighted:
+        for value, p in dist.items():
+            result[value] = result.get(value, 0) + weight * p
+    return result
+
+def convolve(a, b, add=lambda x, y: x + y):
+    result = {}
+    for x, px in a.items():
+        for y, py in b.items():
+            key = add(x, y)
+            result[key] = result.get(key, 0) + px * py
+    return result
+
+def attack_distribution(character):
+    return shift(uniform(5, 15), character.attack_power)
+
+def enemy_action_distribution(enemy):
+    # Joint distribution of (damage, applications per effect) for one enemy turn.
+    attack = {(damage,) + no_counts: p for damage, p in scale(uniform(5, 15), enemy.level).items()}
+    if not enemy.ability:
+        return attack
+    if enemy.ability in enemy_abilities:
+        coef, low, high, effect = enemy_abilities[enemy.ability]
+        added = tuple(int(name == effect) for name in effect_names)
+        special = {(damage,) + added: p for damage, p in shift(uniform(low, high), enemy.level * coef).items()}
+    else:
+        special = {(0,) + no_counts: 1.0}
+    return mix((1 - ability_chance, attack), (ability_chance, special))
+
+def add_actions(a, b):
+    return tuple(x + y for x, y in zip(a, b))
+
+def tick_effects(effects):
+    # StatusEffects.tick on a (stacks, duration) tuple: damage, then expiry.
+    # Turn-skipping effects only expire by skipping turns.
+    damage = 0
+    ticked = []
+    for i, (stacks, duration) in enumerate(effects):
+        if duration and default_rules.skip_mask >> i & 1:
+            ticked.append((stacks, duration))
+        elif duration:
+            damage += default_rules.damage[i] * stacks
+            duration -= 1
+            ticked.append((stacks, duration) if duration > 0 else (0, 0))
+        else:
+            ticked.append((0, 0))
+    return damage, tuple(ticked)
+
+def apply_effects(effects, counts):
+    # StatusEffects.apply repeated `count` times for each effect.
+    if not any(counts):
+        return effects
+    result = list(effects)
+    for i, count in enumerate(counts):
+        for _ in range(count):
+            stacks, duration = result[i]
+            stacking = default_rules.stacking[i]
+            if duration and stacking == "ignore":
+                continue
+            if duration and stacking == "stack":
+                stacks = min(stacks + 1, default_rules.max_stacks[i])
+            else:
+                stacks = 1
+            result[i] = (stacks, default_rules.duration[i])
+    return tuple(result)
+
+def hits_to_kill(attack, health):
+    # Distribution of the number of hits needed to take `health` to 0 or
+    # below, by memoized DP over the enemy's remaining health.
+    @lru_cache(maxsize=None)
+    def hits(remaining):
+        result = {}
+        for damage, p in attack.items():
+            if remaining - damage <= 0:
+                result[1] = result.get(1, 0) + p
+            else:
+                for n, q in hits(remaining - damage).items():
+                    result[n + 1] = result.get(n + 1, 0) + p * q
+        return result
+
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 10000))
+    try:
+        return hits(health)
+    finally:
+        sys.setrecursionlimit(limit)
+
+def add_to(dist, key, p):
+    dist[key] = dist.get(key, 0) + p
+
+class Fight:
+    # Exact model of `encounter.fight` under the AlwaysAttack policy: the
+    # player hits the first living enemy, kills are removed in order, and
+    # status effects land on the player under the StatusEffects rules. The
+    # player's abilities, and the effects they put on enemies, are not modelled.
+    # Enemies that outrank the player in initiative act before the player's
+    # hit each round, the rest after it.
+    #
+    # The player's rolls never depend on their own health, so the number of
+    # hits each enemy survives is an independent distribution. The fight then
+    # reduces to a forward DP over (player HP, effect stacks) in which enemy k
+    # dies on a given turn with its hazard rate P(N = n | N >= n).
+    def __init__(self, character, enemies):
+        self.character = character
+        self.enemies = list(enemies)
+        for enemy in self.enemies:
+            # The DP counts one hit per turn, so the player can never lose one.
+            effect = enemy_abilities.get(enemy.ability, (None,) * 4)[3]
+            if effect in default_rules.index and default_rules.skip_mask >> default_rules.index[effect] & 1:
+                raise ValueError(f"{enemy.ability} skips turns, which this model does not cover.")
+        self.attack = attack_distribution(character)
+        self.kills = [hits_to_kill(self.attack, enemy.health) for enemy in self.enemies]
+        self.fast = [enemy.initiative() > character.initiative() for enemy in self.enemies]
+        self.before = [self.group_distribution(k, True) for k in range(len(self.enemies) + 1)]
+        self.after = [self.group_distribution(k, False) for k in range(len(self.enemies) + 1)]
+        self.progress = self.level_progression()
+
+    def group_distribution(self, k, fast):
+        # Combined turn of the living enemies from k on that act before (or after) the player.
+        result = {(0,) + no_counts: 1.0}
+        for enemy, first in zip(self.enemies[k:], self.fast[k:]):
+            if first == fast:
+                result = convolve(result, enemy_action_distribution(enemy), add_actions)
+        return result
+
+    def level_progression(self):
+        # Health restored by gain_exp after each kill, or None when no level up happens.
+        character = self.character
+        exp, to_next, base_health = character.exp, character.exp_to_next_level, character.base_health
+        level = character.level
+        restores = []
+        for enemy in self.enemies:
+            exp += enemy.level * 5
+            if exp >= to_next:
+                level += 1
+                exp -= to_next
+                to_next = int(to_next * 1.5)
+                base_health += character.health_per_level * level
+                restores.append(base_health)
+            else:
+                restores.append(None)
+        return restores
+
+    def enemies_act(self, dist, group, turn, weight, survivors, lost):
+        if len(group) == 1 and (0,) + no_counts in group:
+            for state, p in dist.items():
+                add_to(survivors, state, weight * p)
+            return
+        for (health, effects), p in dist.items():
+            for (hit, *added), q in group.items():
+                after = health - hit
+                if after <= 0:
+                    add_to(lost, turn, weight * p * q)
+                else:
+                    add_to(survivors, (after, apply_effects(effects, added)), weight * p * q)
+
+    def run(self, max_turns=1000):
+        # Returns per-turn won/lost probability mass and the HP distribution
+        # of fights still in progress at the end of each turn.
+        won, lost, in_progress = {}, {}, {}
+        pending = {1: {(self.character.health, no_effects): 1.0}}
+        for k, kills in enumerate(self.kills):
+            last = k == len(self.enemies) - 1
+            restore = self.progress[k]
+            next_pending = {}
+            for start, dist in sorted(pending.items()):
+                tail = 1.0
+                for n in range(1, max(kills) + 1):
+                    turn = start + n - 1
+                    if turn > max_turns or not dist:
+                        break
+                    hazard = kills.get(n, 0) / tail if tail > 0 else 1.0
+                    tail -= kills.get(n, 0)
+                    # Effects tick first; a player they kill never takes the turn.
+                    ticked = {}
+                    for (health, effects), p in dist.items():
+                        damage, effects = tick_effects(effects)
+                        if health - damage <= 0:
+                            add_to(lost, turn, p)
+                        else:
+                            add_to(ticked, (health - damage, effects), p)
+                    ready = {}
+                    self.enemies_act(ticked, self.before[k], turn, 1.0, ready, lost)
+
+                    killed = {}
+                    if hazard:
+                        for (health, effects), p in ready.items():
+                            add_to(killed, (restore if restore is not None else health, effects), p * hazard)
+                    if last:
+                        add_to(won, turn, sum(killed.values()))
+                    elif killed:
+                        survivors = next_pending.setdefault(turn + 1, {})
+                        self.enemies_act(killed, self.after[k + 1], turn, 1.0, survivors, lost)
+                        record(in_progress, turn, survivors)
+
+                    dist = {}
+                    if hazard < 1:
+                        self.enemies_act(ready, self.after[k], turn, 1 - hazard, dist, lost)
+                        record(in_progress, turn, dist)
+            pending = next_pending
+        return {"won": won, "lost": lost, "in_progress": in_progress}
+
+    def win_probability(self, max_turns=1000):
+        return sum(self.run(max_turns)["won"].values())
+
+    def turn_distributions(self, max_turns=100):
+        result = self.run(max_turns)
+        history = []
+        won = lost = 0.0
+        for turn in range(1, max_turns + 1):
+            won += result["won"].get(turn, 0)
+            lost += result["lost"].get(turn, 0)
+            hp = result["in_progress"].get(turn, {})
+            if not hp and won + lost > 1 - 1e-12:
+                break
+            history.append({"won": won, "lost": lost, "hp": hp})
+        return history
+
+def record(in_progress, turn, dist):
+    hp = in_progress.setdefault(turn, {})
+    for (health, _), p in dist.items():
+        add_to(hp, health, p)
+
+def win_probability(character, enemies):
+    return Fight(character, enemies).win_probability()
+
+def turn_distributions(character, enemies, max_turns=100):
+    return Fight(character, enemies).turn_distributions(max_turns)
+
+def parse_enemy(spec):
+    # "Wolf:4" or "Wolf:4:Savage Bite"
+    parts = spec.split(":")
+    name, level = parts[0], int(parts[1])
+    ability = parts[2] if len(parts) > 2 else None
+    if ability is None:
+        ability = spawn_abilities.get(name)
+    return Enemy(f"{name} Lvl {level}", level, level * 30, ability)
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact win probability for a fight under the always-attack policy (basic attacks only; player abilities are not modelled).")
+    parser.add_argument("-c", "--char-class", default="warrior")
+    parser.add_argument("-l", "--level", type=int, default=1)
+    parser.add_argument("-e", "--enemy", action="append", default=[], help="NAME:LEVEL[:ABILITY], repeatable")
+    parser.add_argument("-t", "--turns", type=int, default=0, help="also print the first N turn distributions")
+    args = parser.parse_args()
+
+    with bus.using(NullSink()):
+        character = make_character(args.char_class, args.level)
+    enemies = [parse_enemy(spec) for spec in args.enemy or ["Wolf:1"]]
+    start = time.perf_counter()
+    p = win_probability(character, enemies)
+    elapsed = time.perf_counter() - start
+    print(f"P(win) = {p:.6f}  ({elapsed * 1000:.1f} ms)")
+    for turn, dist in enumerate(turn_distributions(character, enemies, args.turns), 1):
+        mean = sum(hp * q for hp, q in dist["hp"].items()) / max(sum(dist["hp"].values()), 1e-300)
+        print(f"Turn {turn}: won {dist['won']:.4f}  lost {dist['lost']:.4f}  mean HP while fighting {mean:.1f}")
+
+if __name__ == "__main__":
+    main()
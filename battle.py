@@ -0,0 +1,290 @@
+from events import bus, RoundStarted, EnemyDefeated, GoldGained, Incapacitated, RanAway, CompanionFell
+from gameio import say
+from rng import combat_rng
+from instrumentation import metrics
+
+PARTY = 0
+ENEMIES = 1
+
+ability_chance = 0.3
+
+def first_alive(enemies):
+    for enemy in enemies:
+        if enemy.health > 0:
+            return enemy
+    return enemies[0]
+
+class AlwaysAttack:
+    def choose_action(self, character, enemies):
+        return "a"
+
+    def choose_ability(self, character, available_abilities):
+        return available_abilities[0]
+
+    def choose_target(self, character, enemies):
+        return first_alive(enemies)
+
+class GreedyAbility(AlwaysAttack):
+    # Casts the strongest affordable ability, falling back to a basic attack.
+    def choose_action(self, character, enemies):
+        return "b" if self.best_ability(character) else "a"
+
+    def choose_ability(self, character, available_abilities):
+        return self.best_ability(character)
+
+    def best_ability(self, character):
+        best = None
+        for name, ability in character.abilities.items():
+            if character.level >= ability["level"] and character.mana >= ability["mana_cost"]:
+                if best is None or ability["damage_multiplier"] > character.abilities[best]["damage_multiplier"]:
+                    best = name
+        return best
+
+class InitiativeQueue:
+    # Binary heap of [(-initiative, side, order), combatant, position] entries.
+    # Positions are tracked so a combatant that dies before its turn is cut
+    # out in O(log n). Entries that already acted wait in `acted`; they come
+    # off the heap in key order, so the survivors form a valid heap for the
+    # next round without re-heapifying.
+    def __init__(self):
+        self.heap = []
+        self.acted = []
+        self.entries = {}
+        self.order = 0
+
+    def add(self, combatant, side):
+        entry = [(-combatant.initiative(), side, self.order), combatant, len(self.heap)]
+        self.order += 1
+        self.entries[combatant] = entry
+        self.heap.append(entry)
+        self.sift_up(entry[2])
+
+    def remove(self, combatant):
+        entry = self.entries.pop(combatant, None)
+        if entry is None or entry[2] < 0:
+            # Entries that already acted are dropped when the round rolls over.
+            return
+        i = entry[2]
+        last = self.heap.pop()
+        if last is not entry:
+            self.heap[i] = last
+            last[2] = i
+            self.sift_down(i)
+            self.sift_up(last[2])
+
+    def pop(self):
+        # Next combatant to act this round with its side, or None once everyone has acted.
+        if not self.heap:
+            return None
+        entry = self.heap[0]
+        last = self.heap.pop()
+        if last is not entry:
+            self.heap[0] = last
+            last[2] = 0
+            self.sift_down(0)
+        entry[2] = -1
+        self.acted.append(entry)
+        return entry[1], entry[0][1]
+
+    def next_round(self):
+        entries = self.entries
+        heap = [entry for entry in self.acted if entry[1] in entries]
+        if self.heap:
+            heap.extend(self.heap)
+            heap.sort()
+        for i, entry in enumerate(heap):
+            entry[2] = i
+        self.heap = heap
+        self.acted = []
+
+    def sift_up(self, i):
+        heap = self.heap
+        entry = heap[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if heap[parent][0] <= entry[0]:
+                break
+            heap[i] = heap[parent]
+            heap[i][2] = i
+            i = parent
+        heap[i] = entry
+        entry[2] = i
+
+    def sift_down(self, i):
+        heap = self.heap
+        n = len(heap)
+        entry = heap[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and heap[child + 1][0] < heap[child][0]:
+                child += 1
+            if entry[0] <= heap[child][0]:
+                break
+            heap[i] = heap[child]
+            heap[i][2] = i
+            i = child
+        heap[i] = entry
+        entry[2] = i
+
+    def __len__(self):
+        return len(self.entries)
+
+class Battle:
+    # One fight between the player's party and a group of enemies. Every
+    # round, status effects tick for everyone, then combatants act in
+    # initiative order (highest first, the party winning ties). Characters
+    # use their total agility as initiative and enemies their level.
+    #
+    # `enemies` is the caller's list and is compacted in place once per
+    # player turn rather than on every kill, so policies may see enemies that
+    # fell earlier in the round; first_alive skips them.
+    def __init__(self, character, enemies, policy, companions=(), companion_policy=None):
+        self.character = character
+        self.enemies = enemies
+        self.policy = policy
+        self.companion_policy = companion_policy or GreedyAbility()
+        self.party = [character] + [companion for companion in companions if companion.health > 0]
+        self.party_index = {member: i for i, member in enumerate(self.party)}
+        self.queue = InitiativeQueue()
+        for member in self.party:
+            self.queue.add(member, PARTY)
+        self.enemies_left = 0
+        self.fallen = 0
+        for enemy in enemies:
+            if enemy.health > 0:
+                self.queue.add(enemy, ENEMIES)
+                self.enemies_left += 1
+            else:
+                self.fallen += 1
+
+    def run(self):
+        while True:
+            outcome = self.start_round()
+            if outcome:
+                return outcome
+            turn = self.queue.pop()
+            while turn:
+                combatant, side = turn
+                outcome = self.enemy_turn(combatant) if side == ENEMIES else self.party_turn(combatant)
+                if outcome:
+                    return outcome
+                turn = self.queue.pop()
+            self.queue.next_round()
+
+    def start_round(self):
+        metrics.count("rounds")
+        self.compact()
+        if bus.active:
+            bus.emit(RoundStarted, [(enemy.name, enemy.health, list(enemy.status_effects)) for enemy in self.enemies])
+        for member in self.party:
+            member.process_status_effects()
+        for enemy in self.enemies:
+            enemy.process_status_effects()
+
+        # Effects resolve before anyone acts; a player killed by them loses
+        # before their own damage over time can finish the last enemy.
+        if self.character.health <= 0:
+            return "lost"
+        for member in self.party[1:]:
+            if member.health <= 0:
+                self.fall(member)
+        for enemy in self.enemies:
+            if enemy.health <= 0:
+                self.defeat(enemy, self.character)
+        if not self.enemies_left:
+            return "won"
+        return None
+
+    def compact(self):
+        if self.fallen:
+            self.enemies[:] = [enemy for enemy in self.enemies if enemy.health > 0]
+            self.fallen = 0
+
+    def party_turn(self, member):
+        incapacitated = member.status_effects.skip_turn()
+        if incapacitated:
+            bus.emit(Incapacitated, member.name, incapacitated)
+            return None
+        if member is self.character:
+            self.compact()
+            return self.act(member, self.policy)
+        return self.act(member, self.companion_policy)
+
+    def act(self, member, policy):
+        # Asks the policy until it picks something that takes the turn.
+        enemies = self.enemies
+        while True:
+            action = policy.choose_action(member, enemies)
+            if action == "a":
+                target = policy.choose_target(member, enemies)
+                member.attack(target)
+                if target.health <= 0:
+                    self.defeat(target, member)
+                break
+            elif action == "b":
+                available_abilities = [ability for ability in member.abilities if member.level >= member.abilities[ability]["level"]]
+                if not available_abilities:
+                    say("No abilities available at your current level.")
+                    continue
+                ability_choice = policy.choose_ability(member, available_abilities)
+                if ability_choice not in available_abilities:
+                    say("Invalid ability choice.")
+                    continue
+                if member.abilities[ability_choice]["targets"] == "all":
+                    targets = [enemy for enemy in enemies if enemy.health > 0]
+                else:
+                    targets = [policy.choose_target(member, enemies)]
+                member.use_ability(ability_choice, targets)
+                for target in targets:
+                    if target.health <= 0:
+                        self.defeat(target, member)
+                break
+            elif action == "r":
+                bus.emit(RanAway, member.name)
+                return "fled"
+            else:
+                say("Invalid action!")
+        if not self.enemies_left:
+            return "won"
+        return None
+
+    def enemy_turn(self, enemy):
+        incapacitated = enemy.status_effects.skip_turn()
+        if incapacitated:
+            bus.emit(Incapacitated, enemy.name, incapacitated)
+            return None
+        party = self.party
+        target = party[0] if len(party) == 1 else combat_rng.choice(party)
+        if enemy.ability and combat_rng.random() < ability_chance:
+            enemy.use_ability(target)
+        else:
+            enemy.attack(target)
+        if target.health <= 0:
+            if target is self.character:
+                return "lost"
+            self.fall(target)
+        return None
+
+    def defeat(self, enemy, member):
+        if enemy not in self.queue.entries:
+            return
+        character = self.character
+        bus.emit(EnemyDefeated, member.name, enemy.name)
+        self.queue.remove(enemy)
+        self.enemies_left -= 1
+        self.fallen += 1
+        character.gain_exp(enemy.level * 5)
+        character.gold += enemy.level * 3
+        bus.emit(GoldGained, character.name, enemy.level * 3)
+
+    def fall(self, member):
+        # Swap-remove keeps the party list dense for random targeting.
+        bus.emit(CompanionFell, member.name)
+        self.queue.remove(member)
+        i = self.party_index.pop(member)
+        last = self.party.pop()
+        if last is not member:
+            self.party[i] = last
+            self.party_index[last] = i
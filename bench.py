@@ -0,0 +1,312 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import gameio
+from character import Character
+from enemy import Enemy
+from encounter import generate_enemies, fight
+from entities import enemy_pool
+from battle import AlwaysAttack
+from events import bus, NullSink
+from catalog import Catalog, catalog, generate_items
+from loadout import best_loadout
+from registry import registry
+from pathing import Navigator, directions
+from renderer import ViewportRenderer
+from rng import streams
+from spawns import SpawnSystem
+from utilities import generate_cities, generate_bosses, display_map
+from world import World, ChunkedWorld
+
+# Each benchmark maps a size (or class name) to a zero-argument callable.
+# Setup runs once per size with the RNG streams seeded, and every timing
+# repeat reseeds them, so all repeats run exactly the same workload.
+
+def bench_generate_cities(map_size):
+    return lambda: generate_cities(map_size // 2, map_size)
+
+def bench_generate_bosses(map_size):
+    return lambda: generate_bosses(map_size // 4, map_size)
+
+def bench_world_generate(map_size):
+    return lambda: World.generate(map_size, map_size // 2, map_size // 4)
+
+def bench_encounter(map_size):
+    character = Character("Bench", "warrior")
+    character.position = [0, 0]
+    spawns = SpawnSystem(map_size)
+
+    def run():
+        enemy_pool.release_all(generate_enemies(character, map_size, spawns=spawns))
+    return run
+
+def bench_fight(char_class):
+    policy = AlwaysAttack()
+
+    def run():
+        character = Character("Bench", char_class)
+        for _ in range(4):
+            character.level_up()
+        enemies = [Enemy("Wolf Lvl 3", 3, 90, "Savage Bite"), Enemy("Goblin Lvl 2", 2, 60, "Savage Bite")]
+        fight(character, enemies, policy)
+    return run
+
+def equipped_character():
+    character = Character("Bench", "warrior")
+    for item in catalog:
+        character.equipment[item.item_type] = item
+    character.refresh_stats()
+    return character
+
+def bench_calculate_total_stats(calls):
+    character = equipped_character()
+
+    def run():
+        for _ in range(calls):
+            character.calculate_total_stats()
+    return run
+
+def bench_refresh_stats(calls):
+    character = equipped_character()
+
+    def run():
+        for _ in range(calls):
+            character.refresh_stats()
+    return run
+
+def large_catalog(size):
+    large = Catalog(None)
+    large.extend(catalog)
+    large.extend(generate_items(size - len(large)))
+    return large
+
+def bench_catalog_query(size):
+    large = large_catalog(size)
+    large.query("boots")
+
+    def run():
+        large.query("boots", max_price=40, agility=3, limit=20)
+        large.query(None, max_price=60, strength=8, intelligence=5)
+        large.get("Boots of Swiftness")
+    return run
+
+def bench_buy_and_equip(size):
+    large = large_catalog(size)
+    names = [item.name for item in generate_items(100, start=1)]
+
+    def run():
+        character = Character("Bench", "rogue")
+        character.gold = 10 ** 9
+        for name in names:
+            character.buy_equipment(large.get(name))
+        for name in names:
+            character.equip_item(name)
+    return run
+
+def bench_loadout(size):
+    large = large_catalog(size)
+    best_loadout("warrior", 0, catalog=large)
+
+    def run():
+        for gold in (100, 1000, 10000):
+            best_loadout("warrior", gold, catalog=large)
+    return run
+
+def bench_level_up(levels):
+    def run():
+        character = Character("Bench", "mage")
+        while character.level < levels:
+            character.level_up()
+    return run
+
+def bench_display_map(map_size):
+    character = Character("Bench", "rogue")
+    cities = generate_cities(map_size // 2, map_size)
+    bosses = generate_bosses(map_size // 4, map_size)
+    return lambda: display_map(character, cities, bosses, map_size)
+
+def bench_render_viewport(map_size):
+    world = World.generate(map_size, map_size // 2, map_size // 4)
+    renderer = ViewportRenderer(world)
+    steps = [(x % map_size, map_size // 2) for x in range(200)]
+
+    def run():
+        for position in steps:
+            renderer.render(position)
+    return run
+
+def bench_chunked_render(map_size):
+    # A fresh world each run: startup plus generating every chunk the walk reveals.
+    center = map_size // 2
+    steps = [(center + x, center) for x in range(200)]
+
+    def run():
+        renderer = ViewportRenderer(ChunkedWorld(0, map_size, max_chunks=64))
+        for position in steps:
+            renderer.render(position)
+    return run
+
+def bench_distance_field(map_size):
+    world = World.generate(map_size, map_size // 2, map_size // 4)
+    return lambda: Navigator(world).path((0, 0), "city")
+
+def bench_distance_update(map_size):
+    world = World.generate(map_size, map_size // 2, map_size // 4)
+    field = Navigator(world, max_field_size=map_size).field("boss")
+    bosses = world.bosses[:10]
+
+    def run():
+        for position in bosses:
+            field.remove(position)
+        for position in bosses:
+            field.add(position)
+    return run
+
+offsets = {name: (dx, dy) for name, dx, dy in directions}
+
+def bench_chunked_travel(map_size):
+    # Travel to the nearest boss, defeat it and route to the next one, as
+    # main does; a fresh world each run so there is always a boss to remove.
+    center = (map_size // 2, map_size // 2)
+
+    def run():
+        world = ChunkedWorld(0, map_size, max_chunks=64)
+        navigator = Navigator(world)
+        x, y = center
+        for step in navigator.path(center, "boss"):
+            x, y = x + offsets[step][0], y + offsets[step][1]
+        position = (x, y)
+        world.remove(position)
+        navigator.update(position)
+        navigator.path(position, "boss")
+    return run
+
+benchmarks = {
+    "generate_cities": (bench_generate_cities, [20, 200, 2000]),
+    "generate_bosses": (bench_generate_bosses, [20, 200, 2000]),
+    "world_generate": (bench_world_generate, [20, 200, 2000]),
+    "encounter": (bench_encounter, [20, 200]),
+    "fight": (bench_fight, registry.class_names()),
+    "calculate_total_stats": (bench_calculate_total_stats, [1000]),
+    "refresh_stats": (bench_refresh_stats, [1000]),
+    "level_up": (bench_level_up, [10, 50, 200]),
+    "catalog_query": (bench_catalog_query, [1000, 100000]),
+    "buy_and_equip": (bench_buy_and_equip, [1000, 100000]),
+    "loadout": (bench_loadout, [1000, 100000]),
+    "display_map": (bench_display_map, [20, 100, 400]),
+    "render_viewport": (bench_render_viewport, [20, 200]),
+    "chunked_render": (bench_chunked_render, [1 << 10, 1 << 24]),
+    "distance_field": (bench_distance_field, [20, 200]),
+    "distance_update": (bench_distance_update, [20, 200, 1000]),
+    "chunked_travel": (bench_chunked_travel, [100, 1 << 10, 1 << 24])
+}
+
+def measure(run, seed, repeat, min_time):
+    # Calibrates the call count so one repeat takes at least min_time, then
+    # returns per-call times for each repeat.
+    number = 1
+    while True:
+        streams.seed(seed)
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    times = []
+    for _ in range(repeat):
+        streams.seed(seed)
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        times.append((time.perf_counter() - start) / number)
+    return number, times
+
+def run_benchmarks(selected=None, seed=0, repeat=5, min_time=0.05):
+    results = {}
+    with bus.using(NullSink()), gameio.using(gameio.NullIO()):
+        for name, (factory, sizes) in benchmarks.items():
+            if selected and not any(pattern in name for pattern in selected):
+                continue
+            for size in sizes:
+                streams.seed(seed)
+                number, times = measure(factory(size), seed, repeat, min_time)
+                times.sort()
+                results[f"{name}[{size}]"] = {"best": times[0], "median": times[len(times) // 2],
+                                              "number": number, "repeat": repeat}
+    return {
+        "version": 1,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "results": results
+    }
+
+def compare(baseline, current, threshold=0.10):
+    # Returns (key, baseline best, current best, ratio, status) per benchmark in both runs.
+    rows = []
+    for key, result in current["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            rows.append((key, None, result["best"], None, "new"))
+            continue
+        ratio = result["best"] / base["best"] if base["best"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "REGRESSION"
+        elif ratio < 1 - threshold:
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((key, base["best"], result["best"], ratio, status))
+    return rows
+
+def format_time(seconds):
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark world generation, encounters, combat and rendering.")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("-c", "--compare", metavar="BASELINE", help="compare against a stored JSON baseline")
+    parser.add_argument("--current", metavar="RESULTS", help="compare this results file instead of running")
+    parser.add_argument("-t", "--threshold", type=float, default=0.10, help="relative slowdown flagged as a regression")
+    parser.add_argument("-k", "--filter", action="append", default=[], help="only run benchmarks whose name contains this")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per repeat")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.current:
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+    else:
+        current = run_benchmarks(args.filter, args.seed, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+
+    if not args.compare:
+        for key, result in current["results"].items():
+            print(f"{key:32} {format_time(result['best']):>10}  (x{result['number']})")
+        return
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = 0
+    for key, before, after, ratio, status in compare(baseline, current, args.threshold):
+        change = f"{ratio:6.2f}x" if ratio is not None else "      "
+        print(f"{key:32} {format_time(before):>10} -> {format_time(after):>10}  {change}  {status}")
+        regressions += status == "REGRESSION"
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import json
+import os
+import random
+from bisect import bisect_left, bisect_right
+from item import Item
+
+default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "items.json")
+
+stats = ("strength", "agility", "intelligence")
+
+class SortedIndex:
+    # Items ordered by one numeric key, with the keys alongside for bisect.
+    def __init__(self, items, key):
+        self.items = sorted(items, key=key)
+        self.keys = [key(item) for item in self.items]
+
+    def between(self, low=None, high=None):
+        start = 0 if low is None else bisect_left(self.keys, low)
+        end = len(self.keys) if high is None else bisect_right(self.keys, high)
+        return start, end
+
+class Catalog:
+    # Every purchasable item. The data file is only read on first use, the
+    # name index is kept up to date on every add, and the per-slot sorted
+    # indexes (by price and by each stat bonus) are rebuilt lazily after the
+    # catalog changes. A query walks whichever index narrows the range the
+    # most and filters the rest, so lookups stay logarithmic plus the size of
+    # that range even with 100k+ items.
+    def __init__(self, path=default_path):
+        self.path = path
+        self.loaded = path is None
+        self.by_name = {}
+        self.by_slot = {}
+        self.indexes = None
+        self.frontiers = {}
+
+    def load(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        with open(self.path, encoding="utf-8") as f:
+            for data in json.load(f):
+                self.add(Item(data["name"], data["slot"], data.get("strength", 0), data.get("agility", 0),
+                              data.get("intelligence", 0), data.get("price")))
+
+    def add(self, item):
+        self.load()
+        if item.name in self.by_name:
+            raise ValueError(f"Item {item.name} is already in the catalog.")
+        self.by_name[item.name] = item
+        self.by_slot.setdefault(item.item_type, []).append(item)
+        self.indexes = None
+        self.frontiers.clear()
+
+    def extend(self, items):
+        for item in items:
+            self.add(item)
+
+    def get(self, name):
+        self.load()
+        return self.by_name.get(name)
+
+    def slots(self):
+        self.load()
+        return sorted(self.by_slot)
+
+    def build_indexes(self):
+        indexes = {}
+        for slot, items in list(self.by_slot.items()) + [(None, list(self.by_name.values()))]:
+            index = {"price": SortedIndex(items, lambda item: item.price)}
+            for stat in stats:
+                attribute = stat + "_bonus"
+                index[stat] = SortedIndex(items, lambda item, attribute=attribute: getattr(item, attribute))
+            indexes[slot] = index
+        self.indexes = indexes
+
+    def query(self, slot=None, min_price=None, max_price=None, limit=None, **min_stats):
+        # Items in `slot` (any slot if None) priced within [min_price, max_price]
+        # and with at least the given bonuses, e.g. query("boots", max_price=40, agility=3).
+        # Results come cheapest first.
+        self.load()
+        if self.indexes is None:
+            self.build_indexes()
+        index = self.indexes.get(slot)
+        if index is None:
+            return []
+        for stat in min_stats:
+            if stat not in stats:
+                raise ValueError(f"Unknown stat {stat}.")
+        ranges = [("price",) + index["price"].between(min_price, max_price)]
+        ranges.extend((stat,) + index[stat].between(minimum) for stat, minimum in min_stats.items())
+        key, start, end = min(ranges, key=lambda r: r[2] - r[1])
+        candidates = index[key].items[start:end]
+        if key == "price" and limit is not None and not min_stats:
+            return candidates[:limit]
+        low = float("-inf") if min_price is None else min_price
+        high = float("inf") if max_price is None else max_price
+        checks = [(stat + "_bonus", minimum) for stat, minimum in min_stats.items()]
+        result = [item for item in candidates
+                  if low <= item.price <= high and all(getattr(item, attribute) >= minimum for attribute, minimum in checks)]
+        if key != "price":
+            result.sort(key=lambda item: item.price)
+        return result if limit is None else result[:limit]
+
+    def frontier(self, slot, stat):
+        # The items in `slot` that no cheaper item matches on `stat`, cheapest
+        # first, so each one raises the bonus. Cached until the catalog changes.
+        key = (slot, stat)
+        result = self.frontiers.get(key)
+        if result is None:
+            self.load()
+            if self.indexes is None:
+                self.build_indexes()
+            attribute = stat + "_bonus"
+            result = []
+            best = float("-inf")
+            index = self.indexes.get(slot)
+            for item in index["price"].items if index else ():
+                value = getattr(item, attribute)
+                if value > best:
+                    result.append(item)
+                    best = value
+            self.frontiers[key] = result
+        return result
+
+    def __contains__(self, name):
+        self.load()
+        return name in self.by_name
+
+    def __iter__(self):
+        self.load()
+        return iter(self.by_name.values())
+
+    def __len__(self):
+        self.load()
+        return len(self.by_name)
+
+catalog = Catalog()
+
+prefixes = ["Worn", "Sturdy", "Fine", "Gleaming", "Ancient", "Runed", "Blessed", "Cursed"]
+suffixes = {"strength": "the Bear", "agility": "the Fox", "intelligence": "the Owl"}
+
+def generate_items(count, seed=0, slots=None, start=1):
+    # Procedural items with one or two stat bonuses, named uniquely by a serial number.
+    rng = random.Random(seed)
+    slots = slots or catalog.slots()
+    items = []
+    for serial in range(start, start + count):
+        slot = rng.choice(slots)
+        chosen = rng.sample(stats, rng.randint(1, 2))
+        bonuses = {stat: rng.randint(1, 10) if stat in chosen else 0 for stat in stats}
+        name = f"{rng.choice(prefixes)} {slot.capitalize()} of {suffixes[chosen[0]]} #{serial}"
+        items.append(Item(name, slot, bonuses["strength"], bonuses["agility"], bonuses["intelligence"]))
+    return items
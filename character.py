@@ -1,6 +1,16 @@
-import random
+from events import bus, Moved, ExpGained, LevelUp, DamageDealt, AbilityFailed, EffectApplied
+from effects import StatusEffects
+from registry import registry
+from item import Inventory
+from gameio import say
+from rng import combat_rng
 
 class Character:
+    __slots__ = ("name", "char_class", "level", "base_health", "health", "base_mana", "mana", "position", "exp",
+                 "exp_to_next_level", "gold", "status_effects", "inventory", "equipment", "strength", "agility",
+                 "intelligence", "health_per_level", "mana_per_level", "damage_factor", "primary_stat", "abilities",
+                 "total_strength", "total_agility", "total_intelligence", "attack_power", "ability_power")
+
     def __init__(self, name, char_class):
         self.name = name
         self.char_class = char_class
@@ -13,8 +23,8 @@ class Character:
         self.exp = 0
         self.exp_to_next_level = 10
         self.gold = 50
-        self.status_effects = []
-        self.inventory = []
+        self.status_effects = StatusEffects()
+        self.inventory = Inventory()
         self.equipment = {
             "weapon": None,
             "armor": None,
@@ -22,47 +32,25 @@ class Character:
             "boots": None,
             "trousers": None,
             "shoulderpads": None,
-            "ring": None
+            "ring": None,
+            "neck": None,
+            "gloves": None,
+            "shield": None,
+            "cloak": None
         }
         self.set_class_attributes()
 
     def set_class_attributes(self):
-        if self.char_class == "warrior":
-            self.strength = 10
-            self.agility = 5
-            self.intelligence = 3
-            self.health_per_level = 10
-            self.mana_per_level = 5
-            self.damage_factor = 2
-            self.abilities = {
-                "Heavy Smash": {"level": 1, "mana_cost": 10, "damage_multiplier": 2, "status_effect": None, "targets": 1},
-                "Shield Bash": {"level": 3, "mana_cost": 15, "damage_multiplier": 1.5, "status_effect": "stun", "targets": 1},
-                "Battle Cry": {"level": 5, "mana_cost": 20, "damage_multiplier": 3, "status_effect": None, "targets": "all"}
-            }
-        elif self.char_class == "mage":
-            self.strength = 3
-            self.agility = 5
-            self.intelligence = 10
-            self.health_per_level = 5
-            self.mana_per_level = 10
-            self.damage_factor = 3
-            self.abilities = {
-                "Fireball": {"level": 1, "mana_cost": 10, "damage_multiplier": 2, "status_effect": "burn", "targets": 1},
-                "Ice Blast": {"level": 3, "mana_cost": 15, "damage_multiplier": 1.5, "status_effect": "freeze", "targets": 1},
-                "Lightning Strike": {"level": 5, "mana_cost": 20, "damage_multiplier": 3, "status_effect": None, "targets": "all"}
-            }
-        elif self.char_class == "rogue":
-            self.strength = 5
-            self.agility = 10
-            self.intelligence = 3
-            self.health_per_level = 7
-            self.mana_per_level = 7
-            self.damage_factor = 2.5
-            self.abilities = {
-                "Backstab": {"level": 1, "mana_cost": 10, "damage_multiplier": 2, "status_effect": "bleed", "targets": 1},
-                "Poison Dagger": {"level": 3, "mana_cost": 15, "damage_multiplier": 1.5, "status_effect": "poison", "targets": 1},
-                "Shadow Strike": {"level": 5, "mana_cost": 20, "damage_multiplier": 3, "status_effect": None, "targets": "all"}
-            }
+        spec = registry.classes[self.char_class]
+        self.strength = spec.strength
+        self.agility = spec.agility
+        self.intelligence = spec.intelligence
+        self.health_per_level = spec.health_per_level
+        self.mana_per_level = spec.mana_per_level
+        self.damage_factor = spec.damage_factor
+        self.primary_stat = spec.primary_stat
+        self.abilities = spec.abilities
+        self.refresh_stats()
 
     def move(self, direction, map_size):
         if direction == "n":
@@ -74,12 +62,12 @@ class Character:
         elif direction == "w":
             self.position[0] = max(0, self.position[0] - 1)
         else:
-            print("Invalid direction!")
-        print(f"{self.name} moved to {self.position}")
+            say("Invalid direction!")
+        bus.emit(Moved, self.name, self.position)
 
     def gain_exp(self, amount):
         self.exp += amount
-        print(f"{self.name} gained {amount} exp!")
+        bus.emit(ExpGained, self.name, amount)
         if self.exp >= self.exp_to_next_level:
             self.level_up()
 
@@ -91,9 +79,12 @@ class Character:
         self.health = self.base_health
         self.base_mana += self.mana_per_level * self.level
         self.mana = self.base_mana
-        print(f"{self.name} leveled up to level {self.level}!")
+        self.refresh_stats()
+        bus.emit(LevelUp, self.name, self.level)
 
-    def calculate_total_stats(self):
+    def refresh_stats(self):
+        # Derived stats are cached; call this whenever equipment, level or a
+        # stat-modifying effect changes them.
         total_strength = self.strength
         total_agility = self.agility
         total_intelligence = self.intelligence
@@ -102,98 +93,88 @@ class Character:
                 total_strength += item.strength_bonus
                 total_agility += item.agility_bonus
                 total_intelligence += item.intelligence_bonus
-        return total_strength, total_agility, total_intelligence
+        self.total_strength = total_strength
+        self.total_agility = total_agility
+        self.total_intelligence = total_intelligence
+        primary = getattr(self, "total_" + self.primary_stat)
+        self.attack_power = self.damage_factor * primary
+        self.ability_power = self.damage_factor * primary
+
+    def calculate_total_stats(self):
+        return self.total_strength, self.total_agility, self.total_intelligence
 
     def buy_potion(self):
         if self.gold >= 10:
             self.gold -= 10
             self.health = self.base_health
-            print(f"{self.name} bought a potion and restored health to {self.base_health}!")
+            say(f"{self.name} bought a potion and restored health to {self.base_health}!")
         else:
-            print("Not enough gold to buy a potion!")
+            say("Not enough gold to buy a potion!")
 
     def buy_mana_potion(self):
         if self.gold >= 10:
             self.gold -= 10
             self.mana = self.base_mana
-            print(f"{self.name} bought a mana potion and restored mana to {self.base_mana}!")
+            say(f"{self.name} bought a mana potion and restored mana to {self.base_mana}!")
         else:
-            print("Not enough gold to buy a mana potion!")
+            say("Not enough gold to buy a mana potion!")
 
     def buy_equipment(self, item):
-        if self.gold >= (item.strength_bonus + item.agility_bonus + item.intelligence_bonus) * 10:
-            self.gold -= (item.strength_bonus + item.agility_bonus + item.intelligence_bonus) * 10
-            self.inventory.append(item)
-            print(f"{self.name} bought {item.name}!")
+        if self.gold >= item.price:
+            self.gold -= item.price
+            self.inventory.add(item)
+            say(f"{self.name} bought {item.name}!")
         else:
-            print("Not enough gold to buy this item!")
+            say("Not enough gold to buy this item!")
 
     def equip_item(self, item_name):
-        for item in self.inventory:
-            if item.name == item_name:
-                self.equipment[item.item_type] = item
-                self.inventory.remove(item)
-                print(f"{self.name} equipped {item.name}!")
-                return
-        print(f"{item_name} not found in inventory!")
+        item = self.inventory.remove(item_name)
+        if item is None:
+            say(f"{item_name} not found in inventory!")
+            return
+        self.equipment[item.item_type] = item
+        self.refresh_stats()
+        say(f"{self.name} equipped {item.name}!")
 
     def show_inventory(self):
-        print("Inventory:")
-        for item in self.inventory:
-            print(item)
-        print("Equipped:")
+        say("Inventory:")
+        for item, count in self.inventory.stacks():
+            say(item if count == 1 else f"{item} x{count}")
+        say("Equipped:")
         for slot, item in self.equipment.items():
-            print(f"{slot}: {item}")
+            say(f"{slot}: {item}")
 
     def apply_status_effect(self, effect):
-        self.status_effects.append(effect)
+        if self.status_effects.apply(effect):
+            bus.emit(EffectApplied, self.name, effect)
 
     def process_status_effects(self):
-        for effect in self.status_effects[:]:
-            if effect == "burn":
-                self.health -= 5
-                print(f"{self.name} takes 5 burn damage!")
-            elif effect == "bleed":
-                self.health -= 3
-                print(f"{self.name} takes 3 bleed damage!")
-            elif effect == "poison":
-                self.health -= 4
-                print(f"{self.name} takes 4 poison damage!")
-            elif effect == "freeze":
-                print(f"{self.name} is frozen and cannot move!")
-                self.status_effects.remove(effect)
+        self.health -= self.status_effects.tick(self.name)
+
+    def initiative(self):
+        return self.total_agility
 
     def attack(self, enemy):
-        total_strength, total_agility, total_intelligence = self.calculate_total_stats()
-        base_damage = random.randint(5, 15)
-        if self.char_class == "warrior":
-            damage = base_damage + self.damage_factor * total_strength
-        elif self.char_class == "mage":
-            damage = base_damage + self.damage_factor * total_intelligence
-        elif self.char_class == "rogue":
-            damage = base_damage + self.damage_factor * total_agility
+        damage = combat_rng.randint(5, 15) + self.attack_power
         enemy.health -= damage
-        print(f"{self.name} dealt {damage} damage to {enemy.name}!")
+        bus.emit(DamageDealt, self.name, enemy.name, damage, None)
 
     def use_ability(self, ability_name, targets):
         ability = self.abilities[ability_name]
         if self.mana >= ability["mana_cost"]:
             self.mana -= ability["mana_cost"]
             for target in targets:
-                if self.char_class == "warrior":
-                    damage = self.damage_factor * ability["damage_multiplier"] * self.strength + random.randint(10, 20)
-                elif self.char_class == "mage":
-                    damage = self.damage_factor * ability["damage_multiplier"] * self.intelligence + random.randint(10, 20)
-                elif self.char_class == "rogue":
-                    damage = self.damage_factor * ability["damage_multiplier"] * self.agility + random.randint(10, 20)
+                damage = self.ability_power * ability["damage_multiplier"] + combat_rng.randint(10, 20)
                 target.health -= damage
-                print(f"{self.name} used {ability_name} and dealt {damage} damage to {target.name}!")
+                bus.emit(DamageDealt, self.name, target.name, damage, ability_name)
                 if ability["status_effect"]:
                     target.apply_status_effect(ability["status_effect"])
         else:
-            print(f"Not enough mana to use {ability_name}!")
+            bus.emit(AbilityFailed, self.name, ability_name)
 
 class Companion(Character):
+    __slots__ = ("is_companion",)
+
     def __init__(self, name, char_class):
         super().__init__(name, char_class)
         self.is_companion = True
@@ -0,0 +1,150 @@
+from events import bus, EffectTicked
+
+# Stacking rules:
+#   "stack"   - add a stack (up to max_stacks) and refresh the duration
+#   "refresh" - keep a single stack and reset the duration
+#   "ignore"  - reapplying an active effect does nothing
+# Durations count ticks of process_status_effects; an effect applied during a
+# round is still active for the rest of that round. Effects that skip turns
+# count the owner's skipped turns instead, so they cost a turn whether the
+# owner acts before or after whoever applied them.
+effect_config = {
+    "bleed": {"damage": 3, "duration": 4, "max_stacks": 3, "stacking": "stack"},
+    "poison": {"damage": 4, "duration": 5, "max_stacks": 5, "stacking": "stack"},
+    "burn": {"damage": 5, "duration": 3, "max_stacks": 1, "stacking": "refresh"},
+    "freeze": {"damage": 0, "duration": 1, "max_stacks": 1, "stacking": "ignore", "skips_turn": True},
+    "stun": {"damage": 0, "duration": 1, "max_stacks": 1, "stacking": "ignore", "skips_turn": True}
+}
+
+class EffectRules:
+    def __init__(self, config):
+        self.names = list(config)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.damage = [config[name]["damage"] for name in self.names]
+        self.duration = [config[name]["duration"] for name in self.names]
+        self.max_stacks = [config[name]["max_stacks"] for name in self.names]
+        self.stacking = [config[name]["stacking"] for name in self.names]
+        self.skip_mask = 0
+        for i, name in enumerate(self.names):
+            if config[name].get("skips_turn"):
+                self.skip_mask |= 1 << i
+
+default_rules = EffectRules(effect_config)
+
+class StatusEffects:
+    # Active effects are a bitmask plus per-effect stack and duration
+    # counters, so apply, tick and membership cost O(1) per effect type.
+    # Counters live at stacks[base + i] / durations[base + i], which lets a
+    # pool keep many entities' counters in shared typed arrays. Most actors
+    # never get an effect, so their counters start as a shared empty tuple
+    # and are allocated on the first apply.
+    __slots__ = ("rules", "mask", "stacks", "durations", "base")
+
+    def __init__(self, rules=None):
+        self.rules = rules or default_rules
+        self.mask = 0
+        self.stacks = ()
+        self.durations = ()
+        self.base = 0
+
+    def allocate(self):
+        if not self.stacks:
+            self.stacks = [0] * len(self.rules.names)
+            self.durations = [0] * len(self.rules.names)
+
+    def apply(self, effect):
+        rules = self.rules
+        i = rules.index.get(effect)
+        if i is None:
+            return False
+        bit = 1 << i
+        slot = self.base + i
+        stacking = rules.stacking[i]
+        if self.mask & bit:
+            if stacking == "ignore":
+                return False
+            if stacking == "stack":
+                self.stacks[slot] = min(self.stacks[slot] + 1, rules.max_stacks[i])
+        else:
+            self.allocate()
+            self.mask |= bit
+            self.stacks[slot] = 1
+        self.durations[slot] = rules.duration[i]
+        return True
+
+    def tick(self, name):
+        # Deals one round of damage over time and expires finished effects.
+        # Turn-skipping effects are left to skip_turn().
+        total = 0
+        rules = self.rules
+        mask = self.mask & ~rules.skip_mask
+        if not mask:
+            return 0
+        stacks, durations, base = self.stacks, self.durations, self.base
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            i = bit.bit_length() - 1
+            damage = rules.damage[i] * stacks[base + i]
+            if damage:
+                total += damage
+                bus.emit(EffectTicked, name, rules.names[i], damage)
+            durations[base + i] -= 1
+            if durations[base + i] <= 0:
+                self.mask &= ~bit
+                stacks[base + i] = 0
+        return total
+
+    def incapacitating(self):
+        # Name of an active effect that skips the owner's turn, if any.
+        skipping = self.mask & self.rules.skip_mask
+        if skipping:
+            return self.rules.names[(skipping & -skipping).bit_length() - 1]
+        return None
+
+    def skip_turn(self):
+        # Uses up one turn of an active turn-skipping effect and returns its
+        # name, or None if the owner may act.
+        skipping = self.mask & self.rules.skip_mask
+        if not skipping:
+            return None
+        bit = skipping & -skipping
+        i = bit.bit_length() - 1
+        slot = self.base + i
+        self.durations[slot] -= 1
+        if self.durations[slot] <= 0:
+            self.mask &= ~bit
+            self.stacks[slot] = 0
+        return self.rules.names[i]
+
+    def stack_count(self, effect):
+        i = self.rules.index.get(effect)
+        return self.stacks[self.base + i] if i is not None and self.mask >> i & 1 else 0
+
+    def clear(self):
+        self.mask = 0
+        if not self.stacks:
+            return
+        for i in range(self.base, self.base + len(self.rules.names)):
+            self.stacks[i] = 0
+            self.durations[i] = 0
+
+    def __contains__(self, effect):
+        i = self.rules.index.get(effect)
+        return i is not None and bool(self.mask >> i & 1)
+
+    def __iter__(self):
+        mask = self.mask
+        while mask:
+            bit = mask & -mask
+            mask ^= bit
+            yield self.rules.names[bit.bit_length() - 1]
+
+    def __len__(self):
+        return bin(self.mask).count("1")
+
+    def __bool__(self):
+        return bool(self.mask)
+
+    def __repr__(self):
+        return repr([name if self.stack_count(name) == 1 else f"{name} x{self.stack_count(name)}" for name in self])
@@ -0,0 +1,185 @@
+import threading
+import tracemalloc
+from array import array
+from effects import StatusEffects, default_rules
+from enemy import Enemy
+
+class PooledEffects(StatusEffects):
+    # StatusEffects whose mask and counters live in an EnemyPool's arrays.
+    __slots__ = ("pool", "index")
+
+    def __init__(self, pool):
+        self.rules = pool.rules
+        self.pool = pool
+        self.index = 0
+        self.bind(0)
+
+    def bind(self, index):
+        self.index = index
+        self.base = index * len(self.rules.names)
+        self.stacks = self.pool.stacks
+        self.durations = self.pool.durations
+
+    @property
+    def mask(self):
+        return self.pool.masks[self.index]
+
+    @mask.setter
+    def mask(self, value):
+        self.pool.masks[self.index] = value
+
+class EnemyView(Enemy):
+    # Enemy-compatible handle onto one pool slot. Views are recycled through
+    # the pool, so only enemies currently in play have one.
+    __slots__ = ("pool", "index", "effects")
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.index = -1
+        self.effects = PooledEffects(pool)
+
+    def bind(self, index):
+        self.index = index
+        self.effects.bind(index)
+        return self
+
+    @property
+    def name(self):
+        return self.pool.names[self.index]
+
+    @property
+    def level(self):
+        return self.pool.levels[self.index]
+
+    @level.setter
+    def level(self, value):
+        self.pool.levels[self.index] = value
+
+    @property
+    def health(self):
+        # Stored as a double; whole values read back as ints like a plain Enemy's.
+        health = self.pool.healths[self.index]
+        return int(health) if health.is_integer() else health
+
+    @health.setter
+    def health(self, value):
+        self.pool.healths[self.index] = value
+
+    @property
+    def ability(self):
+        return self.pool.ability_names[self.pool.ability_ids[self.index]]
+
+    @property
+    def status_effects(self):
+        return self.effects
+
+class EnemyPool:
+    # Struct-of-arrays storage for enemies: level, health, ability id and
+    # effect state sit in typed arrays and freed slots are reused, so
+    # encounters stop allocating Enemy objects. Slots are handed out under a
+    # lock so concurrent game sessions can share one pool.
+    def __init__(self, capacity=64, rules=None):
+        self.rules = rules or default_rules
+        self.capacity = 0
+        self.levels = array("i")
+        self.healths = array("d")
+        self.ability_ids = array("B")
+        self.masks = array("I")
+        self.stacks = array("B")
+        self.durations = array("B")
+        self.names = []
+        self.name_cache = {}
+        self.ability_names = [None]
+        self.ability_index = {None: 0}
+        self.free = []
+        self.idle_views = []
+        self.in_use = 0
+        self.lock = threading.Lock()
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        extra = capacity - self.capacity
+        if extra <= 0:
+            return
+        effects = len(self.rules.names)
+        self.levels.extend([0] * extra)
+        self.healths.extend([0.0] * extra)
+        self.ability_ids.extend([0] * extra)
+        self.masks.extend([0] * extra)
+        self.stacks.extend([0] * (extra * effects))
+        self.durations.extend([0] * (extra * effects))
+        self.names.extend([None] * extra)
+        self.free.extend(range(capacity - 1, self.capacity - 1, -1))
+        self.capacity = capacity
+
+    def spawn(self, name, level, health, ability=None):
+        with self.lock:
+            if not self.free:
+                self.grow(max(1, self.capacity * 2))
+            index = self.free.pop()
+            ability_id = self.ability_index.get(ability)
+            if ability_id is None:
+                ability_id = self.ability_index[ability] = len(self.ability_names)
+                self.ability_names.append(ability)
+            self.in_use += 1
+        # Enemy names repeat heavily ("Goblin Lvl 3"), so slots share one string each.
+        self.names[index] = self.name_cache.setdefault(name, name)
+        self.levels[index] = level
+        self.healths[index] = health
+        self.ability_ids[index] = ability_id
+        self.masks[index] = 0
+        effects = len(self.rules.names)
+        for i in range(index * effects, (index + 1) * effects):
+            self.stacks[i] = 0
+            self.durations[i] = 0
+        return index
+
+    def despawn(self, index):
+        with self.lock:
+            self.names[index] = None
+            self.free.append(index)
+            self.in_use -= 1
+
+    def view(self, index):
+        try:
+            view = self.idle_views.pop()
+        except IndexError:
+            view = EnemyView(self)
+        return view.bind(index)
+
+    def acquire(self, name, level, health, ability=None):
+        return self.view(self.spawn(name, level, health, ability))
+
+    def release(self, enemy):
+        if isinstance(enemy, EnemyView) and enemy.pool is self and enemy.index >= 0:
+            self.despawn(enemy.index)
+            enemy.index = -1
+            self.idle_views.append(enemy)
+
+    def release_all(self, enemies):
+        for enemy in enemies:
+            self.release(enemy)
+
+    def __len__(self):
+        return self.in_use
+
+enemy_pool = EnemyPool()
+
+def measure_memory(count=10000):
+    # Bytes per stored enemy for plain Enemy objects versus pool slots.
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    enemies = [Enemy(f"Goblin Lvl {i % 10}", i % 10, 30, "Savage Bite") for i in range(count)]
+    objects = (tracemalloc.get_traced_memory()[0] - before) / count
+    del enemies
+    before = tracemalloc.get_traced_memory()[0]
+    pool = EnemyPool(count)
+    for i in range(count):
+        pool.spawn(f"Goblin Lvl {i % 10}", i % 10, 30, "Savage Bite")
+    pooled = (tracemalloc.get_traced_memory()[0] - before) / count
+    tracemalloc.stop()
+    return {"enemy_object": objects, "pool_slot": pooled}
+
+if __name__ == "__main__":
+    result = measure_memory()
+    print(f"Enemy object: {result['enemy_object']:.0f} bytes  Pool slot: {result['pool_slot']:.0f} bytes")
@@ -0,0 +1,128 @@
+import json
+from collections import namedtuple
+from contextlib import contextmanager
+from gameio import say
+
+Moved = namedtuple("Moved", "name position")
+ExpGained = namedtuple("ExpGained", "name amount")
+LevelUp = namedtuple("LevelUp", "name level")
+GoldGained = namedtuple("GoldGained", "name amount")
+DamageDealt = namedtuple("DamageDealt", "source target amount ability")
+AbilityFailed = namedtuple("AbilityFailed", "name ability")
+EffectApplied = namedtuple("EffectApplied", "target effect")
+EffectTicked = namedtuple("EffectTicked", "target effect amount")
+Incapacitated = namedtuple("Incapacitated", "name effect")
+Encountered = namedtuple("Encountered", "name enemies")
+RoundStarted = namedtuple("RoundStarted", "enemies")
+EnemyDefeated = namedtuple("EnemyDefeated", "name target")
+RanAway = namedtuple("RanAway", "name")
+CompanionFell = namedtuple("CompanionFell", "name")
+
+class EventBus:
+    def __init__(self, *sinks):
+        self.sinks = []
+        self.use(*sinks)
+
+    def use(self, *sinks):
+        # A NullSink is never stored, so a muted bus skips event construction entirely.
+        self.sinks = [sink for sink in sinks if not isinstance(sink, NullSink)]
+
+    def attach(self, sink):
+        if not isinstance(sink, NullSink):
+            self.sinks.append(sink)
+
+    def detach(self, sink):
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+
+    @property
+    def active(self):
+        return bool(self.sinks)
+
+    def emit(self, kind, *fields):
+        if self.sinks:
+            event = kind(*fields)
+            for sink in self.sinks:
+                sink.handle(event)
+
+    @contextmanager
+    def using(self, *sinks):
+        previous = self.sinks
+        self.use(*sinks)
+        try:
+            yield self
+        finally:
+            self.sinks = previous
+
+class NullSink:
+    def handle(self, event):
+        pass
+
+def render_damage(event):
+    if event.ability:
+        return f"{event.source} used {event.ability} and dealt {event.amount} damage to {event.target}!"
+    return f"{event.source} dealt {event.amount} damage to {event.target}!"
+
+def render_round(event):
+    lines = ["\nEnemies:"]
+    for name, health, effects in event.enemies:
+        lines.append(f"{name} - HP: {health} - Effects: {effects}")
+    return "\n".join(lines)
+
+incapacitated_words = {"freeze": "frozen", "stun": "stunned"}
+
+class TerminalSink:
+    renderers = {
+        Moved: lambda e: f"{e.name} moved to {e.position}",
+        ExpGained: lambda e: f"{e.name} gained {e.amount} exp!",
+        LevelUp: lambda e: f"{e.name} leveled up to level {e.level}!",
+        GoldGained: lambda e: f"{e.name} found {e.amount} gold!",
+        DamageDealt: render_damage,
+        AbilityFailed: lambda e: f"Not enough mana to use {e.ability}!",
+        EffectTicked: lambda e: f"{e.target} takes {e.amount} {e.effect} damage!",
+        Incapacitated: lambda e: f"{e.name} is {incapacitated_words.get(e.effect, e.effect)} and cannot move!",
+        Encountered: lambda e: f"{e.name} encountered {', '.join(e.enemies)}!",
+        RoundStarted: render_round,
+        EnemyDefeated: lambda e: f"{e.name} defeated {e.target}!",
+        RanAway: lambda e: f"{e.name} ran away!",
+        CompanionFell: lambda e: f"{e.name} has fallen!"
+    }
+
+    def __init__(self, write=say):
+        self.write = write
+
+    def handle(self, event):
+        render = self.renderers.get(type(event))
+        if render:
+            self.write(render(event))
+
+class JsonlSink:
+    def __init__(self, path, buffer_size=4096):
+        self.file = open(path, "a", encoding="utf-8")
+        self.buffer_size = buffer_size
+        self.buffer = []
+
+    def handle(self, event):
+        record = event._asdict()
+        record["event"] = type(event).__name__
+        self.buffer.append(json.dumps(record, default=list))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+bus = EventBus(TerminalSink())
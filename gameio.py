@@ -0,0 +1,135 @@
+import json
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+class GameIO:
+    # Everything the game says or asks goes through one of these. ask()
+    # returns the player's answer and raises EOFError once there will be no
+    # more; say() writes a line and write() raw text such as a map frame.
+    def ask(self, prompt):
+        raise NotImplementedError
+
+    def say(self, text=""):
+        raise NotImplementedError
+
+    def write(self, text):
+        raise NotImplementedError
+
+class ConsoleIO(GameIO):
+    def ask(self, prompt):
+        return input(prompt)
+
+    def say(self, text=""):
+        print(text)
+
+    def write(self, text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+class RecordingIO(GameIO):
+    # Passes everything through to another IO and appends each answer to a
+    # JSONL session file as it is given, so a crashed session is still
+    # replayable. `options` are the game settings the replay must reuse.
+    def __init__(self, path, seed, io=None, options=None):
+        self.io = io or ConsoleIO()
+        self.file = open(path, "w", encoding="utf-8")
+        self.file.write(json.dumps({"version": 1, "seed": seed, "options": options or {}}) + "\n")
+        self.file.flush()
+
+    def ask(self, prompt):
+        answer = self.io.ask(prompt)
+        self.file.write(json.dumps({"input": answer}) + "\n")
+        self.file.flush()
+        return answer
+
+    def say(self, text=""):
+        self.io.say(text)
+
+    def write(self, text):
+        self.io.write(text)
+
+    def close(self, result=None):
+        if result is not None:
+            self.file.write(json.dumps({"result": result}) + "\n")
+        self.file.close()
+
+class NullIO(GameIO):
+    # Discards all output; there is nobody to answer prompts.
+    def ask(self, prompt):
+        raise EOFError("No input available.")
+
+    def say(self, text=""):
+        pass
+
+    def write(self, text):
+        pass
+
+class ReplayFinished(EOFError):
+    pass
+
+class ReplayIO(NullIO):
+    # Answers prompts from a recorded session and discards all output.
+    def __init__(self, inputs):
+        self.inputs = inputs
+        self.position = 0
+
+    def ask(self, prompt):
+        if self.position >= len(self.inputs):
+            raise ReplayFinished("The recorded session has no more input.")
+        answer = self.inputs[self.position]
+        self.position += 1
+        return answer
+
+def load_session(path):
+    # Returns (seed, inputs, recorded result or None, options).
+    seed, inputs, result, options = None, [], None, {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if "seed" in record:
+                seed = record["seed"]
+                options = record.get("options", {})
+            elif "input" in record:
+                inputs.append(record["input"])
+            elif "result" in record:
+                result = record["result"]
+    return seed, inputs, result, options
+
+# The IO in effect is a context variable, so each thread (one per session
+# in the server) can talk to its own player.
+current_io = ContextVar("current_io", default=ConsoleIO())
+
+def current():
+    return current_io.get()
+
+def use(new_io):
+    current_io.set(new_io)
+
+@contextmanager
+def using(new_io):
+    token = current_io.set(new_io)
+    try:
+        yield new_io
+    finally:
+        current_io.reset(token)
+
+def ask(prompt):
+    return current_io.get().ask(prompt)
+
+def say(text=""):
+    current_io.get().say(text)
+
+def write(text):
+    current_io.get().write(text)
+
+def ask_number(prompt, count):
+    # Asks until the reply is a number from 1 to `count`; returns it zero-based.
+    while True:
+        try:
+            choice = int(ask(prompt))
+        except ValueError:
+            choice = 0
+        if 1 <= choice <= count:
+            return choice - 1
+        say(f"Please enter a number from 1 to {count}.")
@@ -0,0 +1,247 @@
+import cProfile
+import json
+import os
+import signal
+import time
+from collections import Counter
+from gameio import GameIO
+from events import DamageDealt, EffectTicked, Encountered, RoundStarted, EnemyDefeated, LevelUp
+
+def noop(*args):
+    pass
+
+def zero():
+    return 0.0
+
+class Metrics:
+    # Counters and phase timers for the game loop. While disabled, count,
+    # add_time and the turn hooks are bound to no-op functions and clock
+    # returns 0, so instrumented call sites cost one empty call each.
+    def __init__(self):
+        self.counters = Counter()
+        self.timers = {}
+        self.turns = 0
+        self.exporter = None
+        self.profiler = None
+        self.disable()
+
+    def enable(self, exporter=None, profiler=None):
+        self.enabled = True
+        self.exporter = exporter
+        self.profiler = profiler
+        self.count = self._count
+        self.add_time = self._add_time
+        self.clock = time.perf_counter
+        self.turn_started = self._turn_started
+        self.turn_finished = self._turn_finished
+
+    def disable(self):
+        self.enabled = False
+        self.count = noop
+        self.add_time = noop
+        self.clock = zero
+        self.turn_started = zero
+        self.turn_finished = noop
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
+        self.turns = 0
+
+    def _count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def _add_time(self, phase, start):
+        elapsed = time.perf_counter() - start
+        timer = self.timers.get(phase)
+        if timer is None:
+            self.timers[phase] = [elapsed, 1, elapsed]
+        else:
+            timer[0] += elapsed
+            timer[1] += 1
+            if elapsed > timer[2]:
+                timer[2] = elapsed
+
+    def _turn_started(self):
+        if self.profiler:
+            self.profiler.turn_started(self.turns)
+        return time.perf_counter()
+
+    def _turn_finished(self, start):
+        self.turns += 1
+        self.counters["turns"] += 1
+        self._add_time("turn", start)
+        if self.profiler:
+            self.profiler.turn_finished(self.turns)
+        if self.exporter:
+            self.exporter.turn_finished(self)
+
+    def snapshot(self):
+        counters = dict(self.counters)
+        fights = counters.get("fights", 0)
+        return {
+            "turns": self.turns,
+            "counters": counters,
+            "rounds_per_fight": counters.get("rounds", 0) / fights if fights else 0.0,
+            "timers": {phase: {"seconds": total, "count": calls, "max": longest}
+                       for phase, (total, calls, longest) in self.timers.items()}
+        }
+
+    def close(self):
+        if self.profiler:
+            self.profiler.stop()
+        if self.exporter:
+            self.exporter.export(self)
+
+metrics = Metrics()
+
+class MetricsSink:
+    # Event-bus sink that turns combat events into counters. Damage to a
+    # name seen in the current encounter's enemy list counts as dealt,
+    # anything else as taken.
+    def __init__(self, metrics=metrics):
+        self.metrics = metrics
+        self.enemies = set()
+
+    def handle(self, event):
+        kind = type(event)
+        count = self.metrics.count
+        if kind is DamageDealt:
+            if event.target in self.enemies:
+                count("damage_dealt", event.amount)
+            else:
+                count("damage_taken", event.amount)
+        elif kind is EffectTicked:
+            count("effect_ticks")
+            count("effect_damage", event.amount)
+        elif kind is RoundStarted:
+            self.enemies.update(name for name, _, _ in event.enemies)
+        elif kind is Encountered:
+            self.enemies = set(event.enemies)
+        elif kind is EnemyDefeated:
+            count("kills")
+        elif kind is LevelUp:
+            count("level_ups")
+
+def prometheus_text(snapshot, prefix="game"):
+    lines = []
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+    lines.append(f"# TYPE {prefix}_rounds_per_fight gauge")
+    lines.append(f"{prefix}_rounds_per_fight {snapshot['rounds_per_fight']}")
+    lines.append(f"# TYPE {prefix}_phase_seconds summary")
+    for phase, timer in sorted(snapshot["timers"].items()):
+        lines.append(f'{prefix}_phase_seconds_sum{{phase="{phase}"}} {timer["seconds"]}')
+        lines.append(f'{prefix}_phase_seconds_count{{phase="{phase}"}} {timer["count"]}')
+    lines.append(f"# TYPE {prefix}_phase_seconds_max gauge")
+    for phase, timer in sorted(snapshot["timers"].items()):
+        lines.append(f'{prefix}_phase_seconds_max{{phase="{phase}"}} {timer["max"]}')
+    return "\n".join(lines) + "\n"
+
+class MetricsExporter:
+    # Rewrites `path` every `every` turns; ".prom" files get Prometheus
+    # text, anything else JSON. Writes go through a temp file so scrapers
+    # never see a partial file.
+    def __init__(self, path, every=10, format=None):
+        self.path = path
+        self.every = every
+        self.format = format or ("prometheus" if path.endswith(".prom") else "json")
+
+    def turn_finished(self, metrics):
+        if metrics.turns % self.every == 0:
+            self.export(metrics)
+
+    def export(self, metrics):
+        snapshot = metrics.snapshot()
+        if self.format == "prometheus":
+            data = prometheus_text(snapshot)
+        else:
+            data = json.dumps(snapshot, indent=2)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+class ProfileWindow:
+    # Runs cProfile from turn `start` for `turns` turns and dumps pstats to `path`.
+    def __init__(self, path, start=0, turns=50):
+        self.path = path
+        self.start = start
+        self.end = start + turns
+        self.profile = None
+        self.done = False
+
+    def turn_started(self, turn):
+        if not self.done and self.profile is None and turn >= self.start:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def turn_finished(self, turns):
+        if self.profile is not None and turns >= self.end:
+            self.stop()
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+            self.profile.dump_stats(self.path)
+            self.profile = None
+            self.done = True
+
+class SamplingWindow(ProfileWindow):
+    # Statistical alternative to cProfile: a profiling timer interrupts every
+    # `interval` seconds of CPU time and the current stack is tallied. Stacks
+    # are written in collapsed "a;b;c count" form for flame graph tools.
+    # Needs signal.setitimer, so Unix only.
+    def __init__(self, path, start=0, turns=50, interval=0.001):
+        super().__init__(path, start, turns)
+        self.interval = interval
+        self.samples = Counter()
+        self.sampling = False
+
+    def sample(self, signum, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        self.samples[";".join(reversed(stack))] += 1
+
+    def turn_started(self, turn):
+        if not self.done and not self.sampling and turn >= self.start:
+            signal.signal(signal.SIGPROF, self.sample)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+            self.sampling = True
+
+    def turn_finished(self, turns):
+        if self.sampling and turns >= self.end:
+            self.stop()
+
+    def stop(self):
+        if self.sampling:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, signal.SIG_DFL)
+            self.sampling = False
+            self.done = True
+            with open(self.path, "w", encoding="utf-8") as f:
+                for stack, hits in self.samples.most_common():
+                    f.write(f"{stack} {hits}\n")
+
+class TimedIO(GameIO):
+    # Wraps a gameio IO so time spent waiting on prompts is recorded as "input".
+    def __init__(self, io, metrics=metrics):
+        self.io = io
+        self.metrics = metrics
+
+    def ask(self, prompt):
+        start = self.metrics.clock()
+        try:
+            return self.io.ask(prompt)
+        finally:
+            self.metrics.add_time("input", start)
+
+    def say(self, text=""):
+        self.io.say(text)
+
+    def write(self, text):
+        self.io.write(text)
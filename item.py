@@ -1,25 +1,71 @@
 class Item:
-    def __init__(self, name, item_type, strength_bonus=0, agility_bonus=0, intelligence_bonus=0):
+    __slots__ = ("name", "item_type", "strength_bonus", "agility_bonus", "intelligence_bonus", "price")
+
+    def __init__(self, name, item_type, strength_bonus=0, agility_bonus=0, intelligence_bonus=0, price=None):
         self.name = name
         self.item_type = item_type
         self.strength_bonus = strength_bonus
         self.agility_bonus = agility_bonus
         self.intelligence_bonus = intelligence_bonus
+        self.price = (strength_bonus + agility_bonus + intelligence_bonus) * 10 if price is None else price
 
     def __str__(self):
         return f"{self.name} ({self.item_type}, STR: {self.strength_bonus}, AGI: {self.agility_bonus}, INT: {self.intelligence_bonus})"
-    
-items = [
-    Item("Sword of Strength", "weapon", strength_bonus=5),
-    Item("Staff of Wisdom", "weapon", intelligence_bonus=5),
-    Item("Robe of Protection", "armor", intelligence_bonus=3),
-    Item("Helmet of Insight", "helmet", intelligence_bonus=2),
-    Item("Boots of Swiftness", "boots", agility_bonus=3),
-    Item("Trousers of Might", "trousers", strength_bonus=3),
-    Item("Shoulderpads of Fortitude", "shoulderpads", strength_bonus=2),
-    Item("Ring of Dexterity", "ring", agility_bonus=2),
-    Item("Amulet of Power", "neck", strength_bonus=2, intelligence_bonus=2),
-    Item("Gloves of Precision", "gloves", agility_bonus=2),
-    Item("Shield of Resilience", "shield", strength_bonus=3, agility_bonus=2),
-    Item("Cloak of Shadows", "cloak", agility_bonus=3, intelligence_bonus=2)
-]
+
+class Inventory:
+    # Multiset of items keyed by name: add, remove and lookups are O(1) and
+    # duplicates share one entry with a count. `changes` increases on every
+    # mutation so callers can tell cheaply whether the contents moved.
+    def __init__(self, items=()):
+        self.entries = {}
+        self.size = 0
+        self.changes = 0
+        for item in items:
+            self.add(item)
+
+    def add(self, item, count=1):
+        entry = self.entries.get(item.name)
+        if entry is None:
+            self.entries[item.name] = [item, count]
+        else:
+            entry[1] += count
+        self.size += count
+        self.changes += 1
+
+    def remove(self, name):
+        # Takes one copy of `name` out and returns it, or None if there is none.
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        entry[1] -= 1
+        if not entry[1]:
+            del self.entries[name]
+        self.size -= 1
+        self.changes += 1
+        return entry[0]
+
+    def get(self, name):
+        entry = self.entries.get(name)
+        return entry[0] if entry else None
+
+    def count(self, name):
+        entry = self.entries.get(name)
+        return entry[1] if entry else 0
+
+    def stacks(self):
+        # (item, count) pairs in the order items were first added.
+        return [(item, count) for item, count in self.entries.values()]
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __iter__(self):
+        for item, count in self.entries.values():
+            for _ in range(count):
+                yield item
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
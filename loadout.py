@@ -0,0 +1,87 @@
+from collections import namedtuple
+from catalog import catalog as default_catalog
+from registry import registry
+
+# `equip` maps each slot to change onto the item to put there; `buy` lists the
+# items among them that have to be bought first. `cost` is their total price
+# and `attack_power` what the class ends up with.
+Loadout = namedtuple("Loadout", "equip buy cost attack_power")
+
+def bonus(item, stat):
+    return getattr(item, stat + "_bonus") if item else 0
+
+def frontier(options):
+    # Keeps the (cost, value, item) options not dominated by a cheaper one
+    # with at least the same value; options must already be sorted by cost.
+    result = []
+    best = float("-inf")
+    for option in options:
+        if option[1] > best:
+            result.append(option)
+            best = option[1]
+    return result
+
+def slot_options(slot, stat, budget, owned, equipped, catalog):
+    # Keeping the current item is free, so are items already in the
+    # inventory; everything else costs its price.
+    options = [(0, bonus(equipped, stat), None)]
+    options.extend((0, bonus(item, stat), item) for item in owned if item.item_type == slot)
+    for item in catalog.frontier(slot, stat):
+        if item.price > budget:
+            break
+        options.append((item.price, bonus(item, stat), item))
+    options.sort(key=lambda option: (option[0], -option[1]))
+    return frontier(options)
+
+def best_loadout(char_class, gold, inventory=(), equipment=None, catalog=default_catalog):
+    # Multiple-choice knapsack: at most one item per slot, total price within
+    # `gold`, maximizing the bonus to the class's primary stat (attack and
+    # ability power scale with it linearly). Slots are folded in one at a
+    # time over a Pareto front of (cost, bonus) states, so the work grows
+    # with the number of distinct bonus totals rather than with gold or the
+    # product of the slot sizes.
+    spec = registry.classes[char_class]
+    stat = spec.primary_stat
+    equipment = equipment or {}
+    owned = list({item.name: item for item in inventory}.values())
+    # A state is (cost, bonus, picks) with picks a (slot, item, rest) chain.
+    states = [(0, 0, None)]
+    for slot in sorted(set(catalog.slots()) | set(equipment) | {item.item_type for item in owned}):
+        options = slot_options(slot, stat, gold, owned, equipment.get(slot), catalog)
+        # Cheapest way to reach each bonus total, then drop totals that a
+        # higher one reaches at no extra cost.
+        cheapest = {}
+        for cost, value, picks in states:
+            for price, gain, item in options:
+                total = cost + price
+                if total > gold:
+                    break
+                best = cheapest.get(value + gain)
+                if best is None or total < best[0]:
+                    cheapest[value + gain] = (total, picks, item)
+        states = []
+        lowest = float("inf")
+        for value in sorted(cheapest, reverse=True):
+            total, picks, item = cheapest[value]
+            if total < lowest:
+                states.append((total, value, (slot, item, picks) if item else picks))
+                lowest = total
+        states.reverse()
+    cost, value, picks = states[-1]
+    equip = {}
+    while picks:
+        slot, item, picks = picks
+        equip[slot] = item
+    owned_names = {item.name for item in owned}
+    buy = [item for item in equip.values() if item.name not in owned_names]
+    base = getattr(spec, stat) + sum(bonus(item, stat) for slot, item in equipment.items() if slot not in equip)
+    return Loadout(equip, buy, cost, spec.damage_factor * (base + sum(bonus(item, stat) for item in equip.values())))
+
+def recommend(character, catalog=default_catalog):
+    return best_loadout(character.char_class, character.gold, character.inventory, character.equipment, catalog)
+
+def apply_loadout(character, loadout):
+    for item in loadout.buy:
+        character.buy_equipment(item)
+    for item in loadout.equip.values():
+        character.equip_item(item.name)
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from registry import registry
+from rng import streams
+from server import GameServer, PROMPT
+
+# Scripted answers keyed by the start of the prompt they reply to; a
+# callable gets the client's Random. Anything unknown gets an empty line.
+answers = {
+    "Enter your character's name": lambda rng: f"Bot{rng.randrange(1 << 20)}",
+    "Class": lambda rng: rng.choice(registry.class_names()),
+    "Do you want to enter the city": lambda rng: rng.choice("yn"),
+    "Do you want to buy": lambda rng: rng.choice("pmrl"),
+    "Buy and equip this gear": lambda rng: "y",
+    "Move": lambda rng: rng.choice("nnsseewwt"),
+    "Travel to the nearest": lambda rng: rng.choice("ctb"),
+    "Do you want to (a)ttack": lambda rng: "a",
+    "Enter the number of the target": lambda rng: "1"
+}
+
+def answer(prompt, rng):
+    for start, reply in answers.items():
+        if prompt.startswith(start):
+            return reply(rng)
+    return ""
+
+async def client(host, port, turns, seed, latencies):
+    # Plays up to `turns` answers and records, for each one, the time from
+    # sending it to the next prompt arriving. Returns how the session ended.
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    sent = None
+    answered = 0
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                return "ended"
+            text = line.decode("utf-8", "replace")
+            if not text.startswith(PROMPT):
+                continue
+            if sent is not None:
+                latencies.append(time.perf_counter() - sent)
+            if answered >= turns:
+                return "finished"
+            writer.write((answer(text[len(PROMPT):], rng) + "\n").encode("utf-8"))
+            sent = time.perf_counter()
+            answered += 1
+    except ConnectionError:
+        return "dropped"
+    finally:
+        writer.close()
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def run_load(clients, turns, concurrency, seed=0, host=None, port=7777, options=None):
+    server = None
+    if host is None:
+        server = await GameServer("127.0.0.1", 0, max_sessions=concurrency, options=options).start()
+        host, port = "127.0.0.1", server.port
+    latencies = []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with limit:
+            try:
+                return await client(host, port, turns, seed * 1000003 + i, latencies)
+            except OSError:
+                return "refused"
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*[one(i) for i in range(clients)])
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        await server.stop()
+    latencies.sort()
+    return {
+        "clients": clients,
+        "concurrency": concurrency,
+        "turns": len(latencies),
+        "seconds": elapsed,
+        "turns_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "outcomes": {outcome: outcomes.count(outcome) for outcome in sorted(set(outcomes))},
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the game server with scripted clients and report turn latency.")
+    parser.add_argument("-n", "--clients", type=int, default=1000)
+    parser.add_argument("-t", "--turns", type=int, default=50, help="answers each client sends before disconnecting")
+    parser.add_argument("-c", "--concurrency", type=int, default=1000, help="clients connected at once")
+    parser.add_argument("--host", default=None, help="server to test; by default one is started in-process")
+    parser.add_argument("-p", "--port", type=int, default=7777)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--chunked", action="store_true", help="give each in-process session a chunked world")
+    parser.add_argument("-o", "--output", help="also write the report as JSON to this file")
+    args = parser.parse_args()
+
+    threading.stack_size(512 * 1024)
+    streams.seed(args.seed)
+    report = asyncio.run(run_load(args.clients, args.turns, args.concurrency, args.seed, args.host, args.port,
+                                  {"chunked": args.chunked}))
+    print(f"{report['clients']} clients ({report['concurrency']} at once), {report['turns']} turns in "
+          f"{report['seconds']:.2f} s ({report['turns_per_second']:.0f} turns/s)")
+    print(f"Turn latency p50 {report['p50_ms']:.2f} ms  p99 {report['p99_ms']:.2f} ms  max {report['max_ms']:.2f} ms")
+    print(f"Outcomes: {report['outcomes']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,258 @@
-import random
+import argparse
+import time
+import gameio
 from character import Character, Companion
-from item import Item, items
-from utilities import display_map, generate_cities, generate_bosses, hire_companion
-from encounter import encounter
-
-def main():
-    name = input("Enter your character's name: ")
-    print("Choose your class: (warrior, mage, rogue)")
-    char_class = input("Class: ").lower()
-    if char_class not in ["warrior", "mage", "rogue"]:
-        print("Invalid class. Defaulting to warrior.")
+from catalog import catalog
+from loadout import recommend, apply_loadout
+from utilities import hire_companion
+from world import World, ChunkedWorld, unbounded_map_size
+from renderer import ViewportRenderer
+from spawns import SpawnSystem
+from encounter import encounter, steps_until_encounter
+from pathing import Navigator
+from registry import registry
+from save import SaveFile
+from gameio import ask, say, RecordingIO, ReplayIO, load_session
+from events import bus, TerminalSink
+from instrumentation import metrics, MetricsSink, MetricsExporter, ProfileWindow, SamplingWindow, TimedIO
+from rng import streams
+
+save_path = "savegame.dat"
+default_map_size = 20
+# Smallest fixed world with at least one city and one boss.
+min_map_size = 9
+shop_listing = 20
+travel_destinations = {"c": "city", "t": "tavern", "b": "boss"}
+
+def new_game(size=None, chunked=False):
+    name = ask("Enter your character's name: ")
+    class_names = registry.class_names()
+    say(f"Choose your class: ({', '.join(class_names)})")
+    char_class = ask("Class: ").lower()
+    if char_class not in class_names:
+        say("Invalid class. Defaulting to warrior.")
         char_class = "warrior"
-    
-    map_size = 20
+
     player = Character(name, char_class)
-    num_cities = 10
-    num_bosses = 5
-    cities = generate_cities(num_cities, map_size)
-    bosses = generate_bosses(num_bosses, map_size)
+    if chunked:
+        world = ChunkedWorld.generate(size or unbounded_map_size)
+        player.position = [world.map_size // 2, world.map_size // 2]
+        return player, [], world
+    size = size or default_map_size
+    if size < min_map_size:
+        raise ValueError(f"Maps must be at least {min_map_size} tiles wide.")
+    player.position = [size // 2, size // 2]
+    num_cities = size * size // 40
+    num_bosses = size * size // 80
+    world = World.generate(size, num_cities, num_bosses)
+    return player, [], world
 
-    companions = []
+def play(save=None, resume=True, size=None, chunked=False):
+    # Runs one game until the player dies or input runs out and returns the player.
+    if save and resume and save.exists() and ask("Continue your saved game? (y/n): ").lower() == "y":
+        player, companions, world = save.load()
+        say(f"Welcome back, {player.name}!")
+    else:
+        player, companions, world = new_game(size, chunked)
+    if save:
+        save.save(player, companions, world)
+
+    map_size = world.map_size
+    renderer = ViewportRenderer(world)
+    spawns = SpawnSystem(map_size, world)
+    navigator = Navigator(world)
 
     in_city = False
-    cities_with_taverns = random.sample(cities, len(cities) // 2)
-
-    while player.health > 0:
-        print(f"\n{player.name}'s status: Level {player.level}, Health {player.health}, Mana {player.mana}, Position {player.position}, Gold {player.gold}")
-        player.show_inventory()
-        display_map(player, cities, bosses, map_size)
-
-        if tuple(player.position) in cities:
-            if not in_city:
-                enter_city = input("Do you want to enter the city? (y/n): ").lower()
-                if enter_city == "y":
-                    print(f"{player.name} entered the city!")
-                    in_city = True
-                else:
-                    player.move("s", map_size)  # Move south to simulate staying outside of the city
-            if in_city:
-                city_action = input("Do you want to buy a (p)otion, (m)ana potion, (e)quipment, (h)ire companion, or (l)eave city? ").lower()
-                if city_action == "p":
-                    player.buy_potion()
-                elif city_action == "m":
-                    player.buy_mana_potion()
-                elif city_action == "e":
-                    print("Available items:")
-                    for item in items:
-                        print(item)
-                    item_name = input("Enter the name of the item to buy: ")
-                    for item in items:
-                        if item.name == item_name:
-                            player.buy_equipment(item)
-                            break
+
+    try:
+        while player.health > 0:
+            turn_start = metrics.turn_started()
+            say(f"\n{player.name}'s status: Level {player.level}, Health {player.health}, Mana {player.mana}, Position {player.position}, Gold {player.gold}")
+            player.show_inventory()
+            start = metrics.clock()
+            renderer.render(player.position)
+            metrics.add_time("render", start)
+
+            if world.is_city(player.position):
+                if not in_city:
+                    enter_city = ask("Do you want to enter the city? (y/n): ").lower()
+                    if enter_city == "y":
+                        say(f"{player.name} entered the city!")
+                        in_city = True
                     else:
-                        print("Item not found.")
-                elif city_action == "h":
-                    if tuple(player.position) in cities_with_taverns:
-                        if len(companions) < 2:
-                            companion = hire_companion()
-                            if player.gold >= 50:
-                                player.gold -= 50
-                                companions.append(companion)
-                                print(f"{companion.name} the {companion.char_class} has joined your party!")
+                        player.move("s", map_size)  # Move south to simulate staying outside of the city
+                if in_city:
+                    city_action = ask("Do you want to buy a (p)otion, (m)ana potion, (e)quipment, (r)ecommended gear, (h)ire companion, or (l)eave city? ").lower()
+                    if city_action == "p":
+                        player.buy_potion()
+                    elif city_action == "m":
+                        player.buy_mana_potion()
+                    elif city_action == "e":
+                        say(f"Slots: {', '.join(catalog.slots())}")
+                        slot = ask("Browse which slot? (enter for all): ").lower() or None
+                        say("Available items:")
+                        for item in catalog.query(slot, max_price=player.gold, limit=shop_listing):
+                            say(f"{item} - {item.price} gold")
+                        item_name = ask("Enter the name of the item to buy: ")
+                        item = catalog.get(item_name)
+                        if item:
+                            player.buy_equipment(item)
+                        else:
+                            say("Item not found.")
+                    elif city_action == "r":
+                        loadout = recommend(player)
+                        if not loadout.equip:
+                            say("Your gear is already the best you can afford.")
+                        else:
+                            for slot, item in loadout.equip.items():
+                                say(f"{slot}: {item}" + (f" - {item.price} gold" if item in loadout.buy else " (owned)"))
+                            say(f"Total {loadout.cost} gold, attack power {player.attack_power} -> {loadout.attack_power}")
+                            if ask("Buy and equip this gear? (y/n): ").lower() == "y":
+                                apply_loadout(player, loadout)
+                    elif city_action == "h":
+                        if world.has_tavern(player.position):
+                            if len(companions) < 2:
+                                companion = hire_companion()
+                                if player.gold >= 50:
+                                    player.gold -= 50
+                                    companions.append(companion)
+                                    say(f"{companion.name} the {companion.char_class} has joined your party!")
+                                else:
+                                    say("Not enough gold to hire a companion.")
                             else:
-                                print("Not enough gold to hire a companion.")
+                                say("You can only have up to two companions.")
                         else:
-                            print("You can only have up to two companions.")
+                            say("There is no tavern in this city.")
+                    elif city_action == "l":
+                        in_city = False
                     else:
-                        print("There is no tavern in this city.")
-                elif city_action == "l":
+                        say("Invalid action.")
+            else:
+                if in_city:
                     in_city = False
+                direction = ask("Move (n)orth, (s)outh, (e)ast, (w)est, (t)ravel or (i)nventory: ").lower()
+                steps = None
+                if direction in ["n", "s", "e", "w"]:
+                    steps = [direction]
+                elif direction == "t":
+                    destination = ask("Travel to the nearest (c)ity, (t)avern or (b)oss? ").lower()
+                    kind = travel_destinations.get(destination)
+                    if kind is None:
+                        say("Invalid destination!")
+                    else:
+                        steps = navigator.path(player.position, kind)
+                        if steps is None:
+                            say(f"There is no {kind} within reach.")
+                        elif not steps:
+                            say(f"You are already at a {kind}.")
+                elif direction == "i":
+                    item_name = ask("Enter the name of the item to equip: ")
+                    player.equip_item(item_name)
                 else:
-                    print("Invalid action.")
-        else:
-            if in_city:
-                in_city = False
-            direction = input("Move (n)orth, (s)outh, (e)ast, (w)est or (i)nventory: ").lower()
-            if direction in ["n", "s", "e", "w"]:
-                player.move(direction, map_size)
-                encounter(player, map_size)
-            elif direction == "i":
-                item_name = input("Enter the name of the item to equip: ")
-                player.equip_item(item_name)
-            else:
-                print("Invalid action!")
+                    say("Invalid action!")
+                if steps:
+                    # Walk until the rolled encounter step or a boss tile, whichever comes first.
+                    fight_at = steps_until_encounter()
+                    for taken, step in enumerate(steps, 1):
+                        player.move(step, map_size)
+                        on_boss = world.is_boss(player.position)
+                        if taken < fight_at and not on_boss:
+                            continue
+                        if encounter(player, map_size, spawns=spawns, companions=companions) == "won" and on_boss:
+                            world.remove(player.position)
+                            if save:
+                                save.record_removed(player.position)
+                            renderer.invalidate(player.position)
+                            navigator.update(player.position)
+                        companions = [companion for companion in companions if companion.health > 0]
+                        break
+            if save:
+                save.autosave(player, companions, world)
+            metrics.turn_finished(turn_start)
+    except EOFError:
+        say("\nNo more input; stopping here.")
+        return player
+
+    if save:
+        save.delete()
+    say(f"{player.name} has been defeated. Game over!")
+    return player
+
+def summary(player):
+    return {"level": player.level, "exp": player.exp, "health": player.health, "gold": player.gold,
+            "position": list(player.position)}
+
+def replay(path, repeat=1):
+    # Re-runs a recorded session with terminal output suppressed. The best
+    # of `repeat` runs doubles as a fixed workload for timing.
+    seed, inputs, recorded, options = load_session(path)
+    best = None
+    for _ in range(repeat):
+        streams.seed(seed)
+        start = time.perf_counter()
+        with gameio.using(timed(ReplayIO(inputs))), bus.using(*quiet_sinks()):
+            player = play(resume=False, **options)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    say(f"Replayed {len(inputs)} inputs in {best * 1000:.1f} ms (best of {repeat})")
+    if recorded is not None:
+        result = summary(player)
+        say("Replay matches the recording." if result == recorded else f"Replay diverged: recorded {recorded}, got {result}")
+
+def quiet_sinks():
+    return [sink for sink in bus.sinks if not isinstance(sink, TerminalSink)]
+
+def timed(io):
+    return TimedIO(io) if metrics.enabled else io
+
+def instrument(args):
+    exporter = MetricsExporter(args.metrics, args.metrics_every) if args.metrics else None
+    profiler = None
+    if args.profile:
+        window = SamplingWindow if args.sample else ProfileWindow
+        profiler = window(args.profile, args.profile_start, args.profile_turns)
+    metrics.enable(exporter, profiler)
+    bus.attach(MetricsSink())
+    gameio.use(TimedIO(gameio.current()))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play the game.")
+    parser.add_argument("--seed", type=int, default=None, help="root seed for world, spawn and combat rolls")
+    parser.add_argument("--record", metavar="PATH", help="record the session's inputs to PATH")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recorded session without interaction")
+    parser.add_argument("--repeat", type=int, default=1, help="replay this many times and report the best time")
+    parser.add_argument("--save", default=save_path, help="save file path")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--map-size", type=int, default=None, help="side of a new world in tiles")
+    parser.add_argument("--chunked", action="store_true", help="generate a new world lazily in chunks, for very large maps")
+    parser.add_argument("--metrics", metavar="PATH", help="export counters and timers to PATH (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--metrics-every", type=int, default=10, help="export every N turns")
+    parser.add_argument("--profile", metavar="PATH", help="profile a window of turns into PATH")
+    parser.add_argument("--profile-start", type=int, default=0, help="first profiled turn")
+    parser.add_argument("--profile-turns", type=int, default=50, help="number of profiled turns")
+    parser.add_argument("--sample", action="store_true", help="use the sampling profiler and write collapsed stacks")
+    args = parser.parse_args(argv)
+    if args.map_size is not None and not args.chunked and args.map_size < min_map_size:
+        parser.error(f"--map-size must be at least {min_map_size}")
 
-    print(f"{player.name} has been defeated. Game over!")
+    if args.metrics or args.profile:
+        instrument(args)
+    try:
+        if args.replay:
+            replay(args.replay, args.repeat)
+            return
+        seed = streams.seed(args.seed)
+        save = None if args.no_save else SaveFile(args.save)
+        if args.record:
+            options = {"size": args.map_size, "chunked": args.chunked}
+            recorder = RecordingIO(args.record, seed, gameio.current(), options)
+            with gameio.using(recorder):
+                player = play(save, resume=False, **options)
+            recorder.close(summary(player))
+            return
+        play(save, size=args.map_size, chunked=args.chunked)
+    finally:
+        metrics.close()
 
 if __name__ == "__main__":
     main()
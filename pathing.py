@@ -0,0 +1,195 @@
+from array import array
+from collections import deque
+from world import World
+
+UNREACHED = 2 ** 31 - 1
+
+# Step offsets in the order paths prefer them, matching Character.move.
+directions = (("n", 0, -1), ("s", 0, 1), ("e", 1, 0), ("w", -1, 0))
+
+# Destination kind -> (attribute holding its positions, tile test method).
+# Tests are looked up by name so World and ChunkedWorld both answer them.
+destinations = {
+    "city": ("cities", "is_city"),
+    "tavern": ("taverns", "has_tavern"),
+    "boss": ("bosses", "is_boss")
+}
+
+class DistanceField:
+    # Distance from every tile of a size x size square (the whole map unless
+    # `origin` moves it) to the nearest source, from a multi-source BFS.
+    # `owner` records which source each tile's distance comes from: adding a
+    # source only relaxes the tiles it gets closer to, and removing one only
+    # refills the region it owned from that region's border, so neither needs
+    # a pass over the whole square. Sources outside the square are ignored.
+    def __init__(self, size, sources=(), origin=(0, 0)):
+        self.size = size
+        self.origin = tuple(origin)
+        cells = size * size
+        self.dist = array("i", [UNREACHED]) * cells
+        self.owner = array("i", [-1]) * cells
+        self.sources = set()
+        queue = deque()
+        for position in map(tuple, sources):
+            cell = self.cell(position)
+            if cell is not None and position not in self.sources:
+                self.sources.add(position)
+                self.dist[cell] = 0
+                self.owner[cell] = cell
+                queue.append(cell)
+        self.spread(queue)
+
+    def cell(self, position):
+        x = position[0] - self.origin[0]
+        y = position[1] - self.origin[1]
+        if 0 <= x < self.size and 0 <= y < self.size:
+            return y * self.size + x
+        return None
+
+    def neighbours(self, cell):
+        size = self.size
+        y, x = divmod(cell, size)
+        if y > 0:
+            yield cell - size
+        if y < size - 1:
+            yield cell + size
+        if x < size - 1:
+            yield cell + 1
+        if x > 0:
+            yield cell - 1
+
+    def spread(self, queue, seeds=()):
+        # BFS relaxation from `queue`; `seeds` are further (distance, cell)
+        # starts in ascending order, merged in as the BFS reaches their distance.
+        # The neighbour checks are unrolled; this loop runs once per tile.
+        dist = self.dist
+        owner = self.owner
+        size = self.size
+        last = size - 1
+        cells = size * size
+        append = queue.append
+        seeds = deque(seeds)
+        while queue or seeds:
+            if seeds and (not queue or seeds[0][0] <= dist[queue[0]]):
+                cell = seeds.popleft()[1]
+            else:
+                cell = queue.popleft()
+            reach = dist[cell] + 1
+            source = owner[cell]
+            neighbour = cell - size
+            if neighbour >= 0 and reach < dist[neighbour]:
+                dist[neighbour] = reach
+                owner[neighbour] = source
+                append(neighbour)
+            neighbour = cell + size
+            if neighbour < cells and reach < dist[neighbour]:
+                dist[neighbour] = reach
+                owner[neighbour] = source
+                append(neighbour)
+            x = cell % size
+            if x < last and reach < dist[cell + 1]:
+                dist[cell + 1] = reach
+                owner[cell + 1] = source
+                append(cell + 1)
+            if x > 0 and reach < dist[cell - 1]:
+                dist[cell - 1] = reach
+                owner[cell - 1] = source
+                append(cell - 1)
+
+    def add(self, position):
+        position = tuple(position)
+        cell = self.cell(position)
+        if cell is None or position in self.sources:
+            return
+        self.sources.add(position)
+        self.dist[cell] = 0
+        self.owner[cell] = cell
+        self.spread(deque([cell]))
+
+    def remove(self, position):
+        position = tuple(position)
+        if position not in self.sources:
+            return
+        self.sources.discard(position)
+        source = self.cell(position)
+        dist = self.dist
+        owner = self.owner
+        # The tiles owned by a source are connected through their BFS parents,
+        # so a flood fill from the source finds them all.
+        region = [source]
+        owner[source] = -2
+        for cell in region:
+            for neighbour in self.neighbours(cell):
+                if owner[neighbour] == source:
+                    owner[neighbour] = -2
+                    region.append(neighbour)
+        border = set()
+        for cell in region:
+            dist[cell] = UNREACHED
+            owner[cell] = -1
+        for cell in region:
+            for neighbour in self.neighbours(cell):
+                if dist[neighbour] != UNREACHED:
+                    border.add(neighbour)
+        self.spread(deque(), sorted((dist[cell], cell) for cell in border))
+
+    def distance(self, position):
+        cell = self.cell(position)
+        distance = UNREACHED if cell is None else self.dist[cell]
+        return None if distance == UNREACHED else distance
+
+    def path(self, position):
+        # Directions leading from `position` to the nearest source, or None
+        # if no source can be reached.
+        size = self.size
+        x, y = position[0] - self.origin[0], position[1] - self.origin[1]
+        distance = self.distance(position)
+        if distance is None:
+            return None
+        steps = []
+        while distance:
+            for name, dx, dy in directions:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size and self.dist[ny * size + nx] == distance - 1:
+                    steps.append(name)
+                    x, y, distance = nx, ny, distance - 1
+                    break
+        return steps
+
+class Navigator:
+    # One distance field per kind of destination, built on first use. Call
+    # update() whenever a tile changes, e.g. a boss is defeated. Chunked
+    # worlds, which keep no position lists, and maps wider than
+    # `max_field_size` get a field over the square of `radius` tiles around
+    # the traveller instead, rebuilt when they move;
+    # any destination nearer than one it finds lies inside that square too,
+    # so the nearest one found is still the nearest overall.
+    def __init__(self, world, max_field_size=256, radius=64):
+        self.world = world
+        self.windowed = not isinstance(world, World) or world.map_size > max_field_size
+        self.radius = radius
+        self.fields = {}
+
+    def field(self, kind, position=None):
+        if kind not in destinations:
+            raise ValueError(f"Unknown destination {kind}.")
+        field = self.fields.get(kind)
+        if self.windowed:
+            x, y = position
+            origin = (x - self.radius, y - self.radius)
+            if field is None or field.origin != origin:
+                sources = self.world.within((x, y), self.radius, kind)
+                field = self.fields[kind] = DistanceField(2 * self.radius + 1, sources, origin)
+        elif field is None:
+            field = self.fields[kind] = DistanceField(self.world.map_size, getattr(self.world, destinations[kind][0]))
+        return field
+
+    def update(self, position):
+        for kind, field in self.fields.items():
+            if getattr(self.world, destinations[kind][1])(position):
+                field.add(position)
+            else:
+                field.remove(position)
+
+    def path(self, position, kind):
+        return self.field(kind, position).path(position)
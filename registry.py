@@ -0,0 +1,57 @@
+import json
+import os
+from rng import combat_rng
+
+default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "registry.json")
+
+class ClassSpec:
+    def __init__(self, name, data):
+        self.name = name
+        self.strength = data["strength"]
+        self.agility = data["agility"]
+        self.intelligence = data["intelligence"]
+        self.health_per_level = data["health_per_level"]
+        self.mana_per_level = data["mana_per_level"]
+        self.damage_factor = data["damage_factor"]
+        self.primary_stat = data["primary_stat"]
+        self.abilities = {name: dict(ability) for name, ability in data["abilities"].items()}
+
+class EnemyAbility:
+    # A compiled enemy ability: level * coefficient + roll, plus an optional effect.
+    def __init__(self, name, data):
+        self.name = name
+        self.level_coefficient = data["level_coefficient"]
+        self.low, self.high = data["roll"]
+        self.status_effect = data.get("status_effect")
+
+    def __call__(self, enemy, target):
+        damage = enemy.level * self.level_coefficient + combat_rng.randint(self.low, self.high)
+        if self.status_effect:
+            target.apply_status_effect(self.status_effect)
+        return damage
+
+def no_ability(enemy, target):
+    return 0
+
+class Registry:
+    def __init__(self, data):
+        self.classes = {name: ClassSpec(name, spec) for name, spec in data["classes"].items()}
+        self.enemy_abilities = {name: EnemyAbility(name, spec) for name, spec in data["enemy_abilities"].items()}
+        self.enemies = [(e["name"], e["ability"], e["weight"], e["tier"]) for e in data["enemies"]]
+        self.bosses = [(b["name"], b["ability"], b["weight"]) for b in data["bosses"]]
+        self.enemy_archetypes = {name: ability for name, ability, _, _ in self.enemies}
+        for name, ability in list(self.enemy_archetypes.items()) + [(b[0], b[1]) for b in self.bosses]:
+            if ability not in self.enemy_abilities:
+                raise ValueError(f"Enemy {name} uses unknown ability {ability}.")
+
+    def class_names(self):
+        return list(self.classes)
+
+    def enemy_ability(self, name):
+        return self.enemy_abilities.get(name, no_ability)
+
+def load(path=default_path):
+    with open(path, encoding="utf-8") as f:
+        return Registry(json.load(f))
+
+registry = load()
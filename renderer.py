@@ -0,0 +1,74 @@
+from gameio import write
+
+class ViewportRenderer:
+    # Draws a fixed-size window of the world around the player. Static row
+    # strings are cached per (row, window offset); while the window stays put
+    # only the player's old and new rows are rebuilt, and each frame goes out
+    # in a single write, so redraw cost does not depend on the world size.
+    def __init__(self, world, width=21, height=None, stream=None, max_cached_rows=4096):
+        self.world = world
+        self.width = min(width, world.map_size)
+        self.height = min(height or width, world.map_size)
+        self.stream = stream
+        self.max_cached_rows = max_cached_rows
+        self.row_cache = {}
+        self.origin = None
+        self.player = None
+        self.lines = None
+
+    def origin_for(self, position):
+        x, y = position
+        x0 = min(max(0, x - self.width // 2), self.world.map_size - self.width)
+        y0 = min(max(0, y - self.height // 2), self.world.map_size - self.height)
+        return (x0, y0)
+
+    def static_row(self, y, x0):
+        key = (y, x0)
+        row = self.row_cache.get(key)
+        if row is None:
+            if len(self.row_cache) >= self.max_cached_rows:
+                self.row_cache.clear()
+            tile_at = self.world.tile_at
+            row = " ".join(tile_at((x, y)) or "." for x in range(x0, x0 + self.width))
+            self.row_cache[key] = row
+        return row
+
+    def invalidate(self, position):
+        # Call when the tile at `position` changes, e.g. a boss is defeated.
+        x, y = position
+        for key in [key for key in self.row_cache if key[0] == y and key[1] <= x < key[1] + self.width]:
+            del self.row_cache[key]
+        self.lines = None
+
+    def draw_player(self, position):
+        x0, y0 = self.origin
+        x, y = position
+        row = y - y0
+        column = 2 * (x - x0)
+        line = self.lines[row]
+        self.lines[row] = line[:column] + "P" + line[column + 1:]
+
+    def update(self, position):
+        position = tuple(position)
+        origin = self.origin_for(position)
+        if self.lines is None or origin != self.origin:
+            self.origin = origin
+            x0, y0 = origin
+            self.lines = [self.static_row(y, x0) for y in range(y0, y0 + self.height)]
+        elif self.player != position:
+            self.lines[self.player[1] - self.origin[1]] = self.static_row(self.player[1], self.origin[0])
+        else:
+            return self.lines
+        self.player = position
+        self.draw_player(position)
+        return self.lines
+
+    def frame(self, position):
+        return "\n".join(self.update(position)) + "\n"
+
+    def render(self, position):
+        if self.stream is None:
+            write(self.frame(position))
+            return
+        self.stream.write(self.frame(position))
+        self.stream.flush()
@@ -0,0 +1,28 @@
+import random
+
+class RandomStreams:
+    # One generator per subsystem, all derived from a single root seed. Extra
+    # rolls in one subsystem (a longer fight, a different spawn table) never
+    # shift another's sequence, so a seed reproduces each part independently.
+    # Reseeding happens in place, so modules can hold on to the generators.
+    names = ("world", "spawns", "combat")
+
+    def __init__(self, seed=None):
+        self.world = random.Random()
+        self.spawns = random.Random()
+        self.combat = random.Random()
+        self.root_seed = None
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 63)
+        self.root_seed = seed
+        for name in self.names:
+            getattr(self, name).seed(f"{seed}:{name}")
+        return seed
+
+streams = RandomStreams()
+world_rng = streams.world
+spawn_rng = streams.spawns
+combat_rng = streams.combat
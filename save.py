@@ -0,0 +1,271 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+from character import Character, Companion
+from effects import default_rules
+from catalog import catalog
+from world import World, ChunkedWorld, CITY, BOSS
+
+# Snapshot: header, party, world. The journal that follows a snapshot starts
+# with the same header and then holds (kind, length, payload) records; only
+# records whose generation matches the snapshot are replayed on load.
+SNAPSHOT_MAGIC = b"NGSV"
+JOURNAL_MAGIC = b"NGJR"
+VERSION = 4
+
+header = struct.Struct("<4sHI")
+record_header = struct.Struct("<BI")
+# position, level, base health, health, base mana, mana, exp, exp to next level, gold, effect mask
+vitals = struct.Struct("<iiiididiiiI")
+world_kind = struct.Struct("<B")
+world_header = struct.Struct("<HHIII")
+# seed, map size, chunk size, resident chunks, city density, boss density, removed tiles
+chunked_header = struct.Struct("<QIHIddI")
+count = struct.Struct("<H")
+
+TURN = 1
+PARTY = 2
+REMOVED = 3
+
+FIXED_WORLD = 0
+CHUNKED_WORLD = 1
+
+effect_count = len(default_rules.names)
+
+GameState = namedtuple("GameState", "player companions world")
+
+def pack_string(text):
+    data = text.encode("utf-8")
+    return count.pack(len(data)) + data
+
+def unpack_string(buffer, offset):
+    (length,) = count.unpack_from(buffer, offset)
+    offset += count.size
+    return bytes(buffer[offset:offset + length]).decode("utf-8"), offset + length
+
+def whole(value):
+    return int(value) if value.is_integer() else value
+
+def pack_vitals(character):
+    effects = character.status_effects
+    effects.allocate()
+    return vitals.pack(character.position[0], character.position[1], character.level, character.base_health,
+                       character.health, character.base_mana, character.mana, character.exp,
+                       character.exp_to_next_level, character.gold, effects.mask) + \
+        bytes(effects.stacks) + bytes(effects.durations)
+
+def unpack_vitals(character, buffer, offset):
+    (x, y, character.level, character.base_health, character.health, character.base_mana, character.mana,
+     character.exp, character.exp_to_next_level, character.gold, mask) = vitals.unpack_from(buffer, offset)
+    character.position = [x, y]
+    # Health and mana are doubles on disk but stay ints while they are whole.
+    character.health = whole(character.health)
+    character.mana = whole(character.mana)
+    offset += vitals.size
+    effects = character.status_effects
+    effects.mask = mask
+    effects.allocate()
+    effects.stacks[:] = buffer[offset:offset + effect_count]
+    effects.durations[:] = buffer[offset + effect_count:offset + 2 * effect_count]
+    return offset + 2 * effect_count
+
+def pack_character(character):
+    parts = [pack_string(character.name), pack_string(character.char_class), pack_vitals(character),
+             count.pack(len(character.inventory.entries))]
+    parts.extend(pack_string(item.name) + count.pack(copies) for item, copies in character.inventory.stacks())
+    equipped = [(slot, item) for slot, item in character.equipment.items() if item is not None]
+    parts.append(count.pack(len(equipped)))
+    for slot, item in equipped:
+        parts.append(pack_string(slot) + pack_string(item.name))
+    return b"".join(parts)
+
+def unpack_character(buffer, offset, cls=Character):
+    name, offset = unpack_string(buffer, offset)
+    char_class, offset = unpack_string(buffer, offset)
+    character = cls(name, char_class)
+    offset = unpack_vitals(character, buffer, offset)
+    (size,) = count.unpack_from(buffer, offset)
+    offset += count.size
+    for _ in range(size):
+        item_name, offset = unpack_string(buffer, offset)
+        (copies,) = count.unpack_from(buffer, offset)
+        offset += count.size
+        character.inventory.add(lookup_item(item_name), copies)
+    (size,) = count.unpack_from(buffer, offset)
+    offset += count.size
+    for _ in range(size):
+        slot, offset = unpack_string(buffer, offset)
+        item_name, offset = unpack_string(buffer, offset)
+        character.equipment[slot] = lookup_item(item_name)
+    character.refresh_stats()
+    return character, offset
+
+def lookup_item(name):
+    item = catalog.get(name)
+    if item is None:
+        raise ValueError(f"Saved item {name} does not exist.")
+    return item
+
+def pack_party(player, companions):
+    return b"".join([pack_character(player), count.pack(len(companions))] +
+                    [pack_character(companion) for companion in companions])
+
+def unpack_party(buffer, offset):
+    player, offset = unpack_character(buffer, offset)
+    (size,) = count.unpack_from(buffer, offset)
+    offset += count.size
+    companions = []
+    for _ in range(size):
+        companion, offset = unpack_character(buffer, offset, Companion)
+        companions.append(companion)
+    return player, companions, offset
+
+def pack_positions(positions):
+    return struct.pack(f"<{2 * len(positions)}I", *[value for position in positions for value in position])
+
+def pack_world(world):
+    if isinstance(world, ChunkedWorld):
+        # Chunks regenerate from the seed; only the tiles cleared since need storing.
+        removed = sorted(world.removed)
+        return world_kind.pack(CHUNKED_WORLD) + \
+            chunked_header.pack(world.seed, world.map_size, world.chunk_size, world.max_chunks, world.city_density,
+                                world.boss_density, len(removed)) + pack_positions(removed)
+    taverns = sorted(world.taverns)
+    return world_kind.pack(FIXED_WORLD) + \
+        world_header.pack(world.map_size, world.bucket_size, len(world.cities), len(world.bosses), len(taverns)) + \
+        pack_positions(world.cities) + pack_positions(world.bosses) + pack_positions(taverns)
+
+def unpack_world(buffer, offset):
+    (kind,) = world_kind.unpack_from(buffer, offset)
+    offset += world_kind.size
+    if kind == CHUNKED_WORLD:
+        seed, map_size, chunk_size, max_chunks, city_density, boss_density, removed = \
+            chunked_header.unpack_from(buffer, offset)
+        offset += chunked_header.size
+        world = ChunkedWorld(seed, map_size, chunk_size, max_chunks, city_density, boss_density)
+        end = offset + 8 * removed
+        values = memoryview(buffer)[offset:end].cast("I")
+        world.removed.update((values[2 * i], values[2 * i + 1]) for i in range(removed))
+        values.release()
+        return world, end
+    map_size, bucket_size, cities, bosses, taverns = world_header.unpack_from(buffer, offset)
+    offset += world_header.size
+    world = World(map_size, bucket_size)
+    # One cast over the mapped bytes decodes every coordinate without copying the section.
+    end = offset + 8 * (cities + bosses + taverns)
+    values = memoryview(buffer)[offset:end].cast("I")
+    for i in range(cities + bosses):
+        world.place((values[2 * i], values[2 * i + 1]), CITY if i < cities else BOSS)
+    for i in range(cities + bosses, cities + bosses + taverns):
+        world.add_tavern((values[2 * i], values[2 * i + 1]))
+    values.release()
+    return world, end
+
+def read_header(buffer, magic):
+    if len(buffer) < header.size:
+        raise ValueError("Save file is truncated.")
+    found, version, generation = header.unpack_from(buffer, 0)
+    if found != magic:
+        raise ValueError("Not a save file.")
+    if version != VERSION:
+        raise ValueError(f"Unsupported save version {version}.")
+    return generation
+
+class SaveFile:
+    # A snapshot at `path` plus an append-only journal at `path.journal`.
+    # autosave() appends the party's vitals every turn (a single small
+    # unbuffered write) and only re-encodes the party when inventory,
+    # equipment or companions changed. After `snapshot_every` records the
+    # journal is folded into a fresh snapshot.
+    def __init__(self, path, snapshot_every=256):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.snapshot_every = snapshot_every
+        self.generation = 0
+        self.records = 0
+        self.journal = None
+        self.party_signature = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def save(self, player, companions, world):
+        self.close()
+        self.generation += 1
+        data = header.pack(SNAPSHOT_MAGIC, VERSION, self.generation) + pack_party(player, companions) + pack_world(world)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+        self.journal = open(self.journal_path, "wb", buffering=0)
+        self.journal.write(header.pack(JOURNAL_MAGIC, VERSION, self.generation))
+        self.records = 0
+        self.party_signature = signature(player, companions)
+
+    def append(self, kind, payload):
+        self.journal.write(record_header.pack(kind, len(payload)) + payload)
+        self.records += 1
+
+    def autosave(self, player, companions, world):
+        if self.journal is None or self.records >= self.snapshot_every:
+            self.save(player, companions, world)
+            return
+        party = signature(player, companions)
+        if party != self.party_signature:
+            self.party_signature = party
+            self.append(PARTY, pack_party(player, companions))
+        self.append(TURN, b"".join([pack_vitals(player)] + [pack_vitals(companion) for companion in companions]))
+
+    def record_removed(self, position):
+        if self.journal is not None:
+            self.append(REMOVED, pack_positions([position]))
+
+    def load(self):
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            self.generation = read_header(buffer, SNAPSHOT_MAGIC)
+            player, companions, offset = unpack_party(buffer, header.size)
+            world, offset = unpack_world(buffer, offset)
+        player, companions = self.replay(player, companions, world)
+        return GameState(player, companions, world)
+
+    def replay(self, player, companions, world):
+        if not os.path.exists(self.journal_path) or os.path.getsize(self.journal_path) <= header.size:
+            return player, companions
+        with open(self.journal_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if read_header(buffer, JOURNAL_MAGIC) != self.generation:
+                # A journal left over from an older snapshot.
+                return player, companions
+            offset = header.size
+            while offset + record_header.size <= len(buffer):
+                kind, length = record_header.unpack_from(buffer, offset)
+                start = offset + record_header.size
+                if start + length > len(buffer):
+                    # A record cut short by a crash mid-write.
+                    break
+                if kind == PARTY:
+                    player, companions, _ = unpack_party(buffer, start)
+                elif kind == TURN:
+                    position = unpack_vitals(player, buffer, start)
+                    for companion in companions:
+                        position = unpack_vitals(companion, buffer, position)
+                elif kind == REMOVED:
+                    x, y = struct.unpack_from("<2I", buffer, start)
+                    world.remove((x, y))
+                offset = start + length
+        return player, companions
+
+    def delete(self):
+        self.close()
+        for path in (self.path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+def signature(player, companions):
+    # Cheap identity check for the rarely changing part of the party.
+    return (player.inventory.changes, tuple(map(id, player.equipment.values())), tuple(map(id, companions)))
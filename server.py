@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import queue
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+import gameio
+from catalog import catalog
+from main import play, min_map_size
+from rng import streams
+
+# Line protocol: every line the game says arrives as-is, raw writes (map
+# frames) arrive unchanged, and a prompt arrives as one line starting with
+# "? ". The client answers each prompt with one line. A session ends when
+# the player dies or the client disconnects.
+PROMPT = "? "
+
+class SessionIO(gameio.GameIO):
+    # Connects one game thread to its asyncio connection. Output is buffered
+    # and handed to the event loop in one piece when the game asks for input,
+    # and ask() blocks only this session's thread until the loop delivers the
+    # client's next line.
+    def __init__(self, loop, writer):
+        self.loop = loop
+        self.writer = writer
+        self.inputs = queue.SimpleQueue()
+        self.output = []
+
+    def flush(self):
+        if self.output:
+            data = "".join(self.output).encode("utf-8")
+            self.output = []
+            self.loop.call_soon_threadsafe(self.writer.write, data)
+
+    def ask(self, prompt):
+        self.output.append(f"{PROMPT}{prompt}\n")
+        self.flush()
+        line = self.inputs.get()
+        if line is None:
+            raise EOFError("The client disconnected.")
+        return line
+
+    def say(self, text=""):
+        self.output.append(f"{text}\n")
+
+    def write(self, text):
+        self.output.append(text)
+
+    def close(self):
+        self.flush()
+        self.loop.call_soon_threadsafe(self.writer.close)
+
+def run_session(session, options):
+    with gameio.using(session):
+        try:
+            play(None, resume=False, **options)
+        except Exception:
+            traceback.print_exc()
+            session.say("The session ended because of a server error.")
+        finally:
+            session.close()
+
+class GameServer:
+    # Hosts independent game sessions over TCP. The game itself is blocking
+    # code, so each session runs play() on its own worker thread while one
+    # event loop does all the socket I/O; a player who is slow to answer
+    # only ever holds up their own thread.
+    def __init__(self, host="127.0.0.1", port=7777, max_sessions=1024, options=None):
+        self.host = host
+        self.port = port
+        self.max_sessions = max_sessions
+        self.options = options or {}
+        self.sessions = 0
+        self.handlers = set()
+        self.executor = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="session")
+        self.server = None
+        # Loaded up front so sessions never race to load it lazily.
+        catalog.load()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, backlog=self.max_sessions)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        # Stops accepting connections and waits for the open sessions to end.
+        self.server.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        self.executor.shutdown()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(wait=False)
+
+    async def handle(self, reader, writer):
+        if self.sessions >= self.max_sessions:
+            writer.write(b"The server is full, try again later.\n")
+            writer.close()
+            return
+        self.sessions += 1
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        loop = asyncio.get_running_loop()
+        session = SessionIO(loop, writer)
+        game = loop.run_in_executor(self.executor, run_session, session, self.options)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                session.inputs.put(line.decode("utf-8", "replace").rstrip("\r\n"))
+        finally:
+            session.inputs.put(None)
+            await game
+            writer.close()
+            self.sessions -= 1
+            self.handlers.discard(task)
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many game sessions over a TCP line protocol.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=7777)
+    parser.add_argument("-m", "--max-sessions", type=int, default=1024)
+    parser.add_argument("--seed", type=int, default=None, help="root seed for world, spawn and combat rolls")
+    parser.add_argument("--map-size", type=int, default=None, help="side of each session's world in tiles")
+    parser.add_argument("--chunked", action="store_true", help="give each session a lazily generated chunked world")
+    parser.add_argument("--stack-size", type=int, default=512, help="KiB of stack per session thread")
+    args = parser.parse_args()
+    if args.map_size is not None and not args.chunked and args.map_size < min_map_size:
+        parser.error(f"--map-size must be at least {min_map_size}")
+
+    # Thousands of idle session threads mostly cost their stacks; the game
+    # never recurses deeply, so a small one is plenty.
+    threading.stack_size(args.stack_size * 1024)
+    streams.seed(args.seed)
+    server = GameServer(args.host, args.port, args.max_sessions, {"size": args.map_size, "chunked": args.chunked})
+
+    async def serve():
+        await server.start()
+        print(f"Serving on {server.host}:{server.port}", file=sys.stderr)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
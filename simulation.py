@@ -0,0 +1,149 @@
+import argparse
+import os
+import gameio
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from character import Character
+from enemy import Enemy
+from encounter import generate_enemies, fight
+from battle import AlwaysAttack, GreedyAbility
+from entities import enemy_pool
+from events import bus, NullSink
+from loadout import recommend, apply_loadout
+from rng import streams
+
+class RunBelow(GreedyAbility):
+    def __init__(self, threshold):
+        self.threshold = threshold
+
+    def choose_action(self, character, enemies):
+        if character.health < self.threshold:
+            return "r"
+        return super().choose_action(character, enemies)
+
+policies = {
+    "attack": AlwaysAttack,
+    "greedy": GreedyAbility,
+    "run": RunBelow
+}
+
+class CountingPolicy:
+    # `fight` asks for one action per player turn, so counting the calls
+    # gives the number of turns the player took.
+    def __init__(self, policy):
+        self.policy = policy
+        self.turns = 0
+
+    def choose_action(self, character, enemies):
+        self.turns += 1
+        return self.policy.choose_action(character, enemies)
+
+    def choose_ability(self, character, available_abilities):
+        return self.policy.choose_ability(character, available_abilities)
+
+    def choose_target(self, character, enemies):
+        return self.policy.choose_target(character, enemies)
+
+class SimulationResult:
+    def __init__(self):
+        self.fights = 0
+        self.outcomes = Counter()
+        self.turns_to_kill = Counter()
+        self.hp_remaining = Counter()
+
+    def merge(self, other):
+        self.fights += other.fights
+        self.outcomes.update(other.outcomes)
+        self.turns_to_kill.update(other.turns_to_kill)
+        self.hp_remaining.update(other.hp_remaining)
+        return self
+
+    @property
+    def win_rate(self):
+        return self.outcomes["won"] / self.fights if self.fights else 0.0
+
+    def summary(self):
+        return {
+            "fights": self.fights,
+            "win_rate": self.win_rate,
+            "outcomes": dict(self.outcomes),
+            "turns_to_kill": dict(sorted(self.turns_to_kill.items())),
+            "hp_remaining": dict(sorted(self.hp_remaining.items()))
+        }
+
+def make_character(char_class, level, gold=None):
+    character = Character(f"Sim {char_class}", char_class)
+    while character.level < level:
+        character.level_up()
+    if gold is not None:
+        # Kit the character out with the best gear `gold` buys.
+        character.gold = gold
+        with gameio.using(gameio.NullIO()):
+            apply_loadout(character, recommend(character))
+    return character
+
+def make_enemies(character, map_size, enemy_spec):
+    if enemy_spec is None:
+        return generate_enemies(character, map_size)
+    return [Enemy(f"{name} Lvl {level}", level, level * 30, ability) for name, level, ability in enemy_spec]
+
+def run_fights(num_fights, char_class="warrior", level=1, policy=None, seed=None, map_size=20, position=None, enemy_spec=None, hp_bucket=10, gold=None):
+    streams.seed(seed)
+    policy = policy or AlwaysAttack()
+    result = SimulationResult()
+    with bus.using(NullSink()):
+        for _ in range(num_fights):
+            character = make_character(char_class, level, gold)
+            if position is not None:
+                character.position = list(position)
+            counter = CountingPolicy(policy)
+            enemies = make_enemies(character, map_size, enemy_spec)
+            outcome = fight(character, list(enemies), counter)
+            enemy_pool.release_all(enemies)
+            result.fights += 1
+            result.outcomes[outcome] += 1
+            if outcome == "won":
+                result.turns_to_kill[counter.turns] += 1
+            result.hp_remaining[max(0, int(character.health)) // hp_bucket * hp_bucket] += 1
+    return result
+
+def _run_shard(args):
+    num_fights, kwargs = args
+    return run_fights(num_fights, **kwargs)
+
+def run_batch(num_fights, workers=None, seed=0, **kwargs):
+    workers = workers or os.cpu_count() or 1
+    shards = [num_fights // workers + (1 if i < num_fights % workers else 0) for i in range(workers)]
+    jobs = [(count, dict(kwargs, seed=seed * 1000003 + i)) for i, count in enumerate(shards) if count]
+    result = SimulationResult()
+    if len(jobs) == 1:
+        return result.merge(_run_shard(jobs[0]))
+    with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+        # Chunked fights per worker keep IPC to one round trip per shard.
+        for partial in executor.map(_run_shard, jobs):
+            result.merge(partial)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless combat simulations.")
+    parser.add_argument("-n", "--fights", type=int, default=1000)
+    parser.add_argument("-c", "--char-class", default="warrior")
+    parser.add_argument("-l", "--level", type=int, default=1)
+    parser.add_argument("-p", "--policy", choices=sorted(policies), default="attack")
+    parser.add_argument("--run-below", type=int, default=30)
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--map-size", type=int, default=20)
+    parser.add_argument("-g", "--gold", type=int, default=None, help="equip the best gear this much gold buys")
+    args = parser.parse_args()
+
+    policy = RunBelow(args.run_below) if args.policy == "run" else policies[args.policy]()
+    result = run_batch(args.fights, workers=args.workers, seed=args.seed, char_class=args.char_class,
+                       level=args.level, policy=policy, map_size=args.map_size, gold=args.gold)
+    summary = result.summary()
+    print(f"Fights: {summary['fights']}  Win rate: {summary['win_rate']:.3f}  Outcomes: {summary['outcomes']}")
+    print(f"Turns to kill: {summary['turns_to_kill']}")
+    print(f"HP remaining: {summary['hp_remaining']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from functools import lru_cache
+from enemy import Boss
+from registry import registry
+from rng import spawn_rng
+
+# (name, ability, weight, first tier the enemy appears in) and (name, ability, weight)
+enemy_spawns = registry.enemies
+boss_spawns = registry.bosses
+enemy_abilities = registry.enemy_archetypes
+
+class AliasTable:
+    # Walker/Vose alias method: O(n) to build, O(1) per weighted sample.
+    def __init__(self, items, weights):
+        n = len(items)
+        total = float(sum(weights))
+        self.items = list(items)
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1 - scaled[s]
+            (small if scaled[l] < 1 else large).append(l)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng=spawn_rng):
+        i = int(rng.random() * len(self.items))
+        return self.items[i] if rng.random() < self.prob[i] else self.items[self.alias[i]]
+
+class SpawnSystem:
+    # Spawn tables compiled once per map: the level zone for every ring of
+    # Chebyshev distance from the center, one alias table per tier and a
+    # boss table used on boss tiles. Chunked worlds set a level per chunk
+    # instead, which also keeps the tables independent of the map size.
+    def __init__(self, map_size, world=None, tiers=5, rng=spawn_rng):
+        self.map_size = map_size
+        self.world = world
+        self.rng = rng
+        self.tiers = tiers
+        if world is not None and hasattr(world, "zone_at"):
+            self.zone_level = self.zone_tier = None
+        else:
+            center = map_size // 2
+            rings = max(center, map_size - 1 - center) + 1
+            self.zone_level = [d // 2 for d in range(rings)]
+            self.zone_tier = [min(tiers - 1, d * tiers // rings) for d in range(rings)]
+        self.tables = []
+        for tier in range(tiers):
+            available = [(name, ability) for name, ability, _, first in enemy_spawns if first <= tier]
+            weights = [weight for _, _, weight, first in enemy_spawns if first <= tier]
+            self.tables.append(AliasTable(available, weights))
+        self.boss_table = AliasTable([(name, ability) for name, ability, _ in boss_spawns], [w for _, _, w in boss_spawns])
+        self.names = {}
+
+    def ring(self, position):
+        center = self.map_size // 2
+        return max(abs(position[0] - center), abs(position[1] - center))
+
+    def zone(self, position):
+        # (level, tier) of the difficulty zone at `position`.
+        if self.zone_level is None:
+            level = self.world.zone_at(position)
+            return level, min(self.tiers - 1, level)
+        ring = self.ring(position)
+        return self.zone_level[ring], self.zone_tier[ring]
+
+    def enemy_name(self, name, level):
+        key = (name, level)
+        label = self.names.get(key)
+        if label is None:
+            label = self.names[key] = f"{name} Lvl {level}"
+        return label
+
+    def generate(self, character, pool):
+        rng = self.rng
+        zone_level, tier = self.zone(character.position)
+        if self.world is not None and self.world.is_boss(character.position):
+            name, ability = self.boss_table.sample(rng)
+            level = max(1, zone_level, character.level)
+            return [Boss(self.enemy_name(name, level * 2), level, level * 30, ability)]
+        table = self.tables[tier]
+        enemies = []
+        for _ in range(rng.randint(1, 3)):
+            name, ability = table.sample(rng)
+            level = max(1, zone_level + rng.randint(-1, 1), character.level)
+            enemies.append(pool.acquire(self.enemy_name(name, level), level, level * 30, ability))
+        return enemies
+
+@lru_cache(maxsize=None)
+def default_spawns(map_size):
+    return SpawnSystem(map_size)
@@ -0,0 +1,80 @@
+import random
+import pytest
+from battle import Battle, InitiativeQueue, AlwaysAttack, PARTY, ENEMIES
+from enemy import Enemy
+from events import bus, NullSink
+from simulation import make_character
+
+class Actor:
+    def __init__(self, speed):
+        self.speed = speed
+
+    def initiative(self):
+        return self.speed
+
+def drain(queue):
+    order = []
+    turn = queue.pop()
+    while turn:
+        order.append(turn[0])
+        turn = queue.pop()
+    return order
+
+def test_queue_orders_by_initiative_then_side_then_insertion():
+    a, b, c, d = Actor(5), Actor(9), Actor(5), Actor(5)
+    queue = InitiativeQueue()
+    queue.add(a, ENEMIES)
+    queue.add(b, ENEMIES)
+    queue.add(c, PARTY)
+    queue.add(d, ENEMIES)
+    assert drain(queue) == [b, c, a, d]
+
+def test_queue_remove_matches_sorted_order():
+    rng = random.Random(7)
+    for _ in range(200):
+        actors = [Actor(rng.randint(1, 6)) for _ in range(rng.randint(1, 12))]
+        queue = InitiativeQueue()
+        for actor in actors:
+            queue.add(actor, rng.choice((PARTY, ENEMIES)))
+        expected = sorted(actors, key=lambda actor: queue.entries[actor][0])
+        # Part of a round goes by, then combatants on both sides of it fall.
+        acted = [queue.pop()[0] for _ in range(rng.randint(0, len(actors)))]
+        removed = rng.sample(actors, rng.randint(0, len(actors)))
+        for actor in removed:
+            queue.remove(actor)
+        remaining = [actor for actor in expected if actor not in removed]
+        assert drain(queue) == [actor for actor in remaining if actor not in acted]
+        queue.next_round()
+        assert drain(queue) == remaining
+        assert len(queue) == len(remaining)
+
+def test_freeze_costs_a_faster_enemy_its_next_turn():
+    class IceBlast(AlwaysAttack):
+        def choose_action(self, character, enemies):
+            return "b"
+
+        def choose_ability(self, character, available_abilities):
+            character.mana = 999
+            return "Ice Blast"
+
+    with bus.using(NullSink()):
+        for level, expected in ((4, 5), (8, 4)):
+            character = make_character("mage", 4)
+            character.health = character.base_health = 10 ** 6
+            enemy = Enemy("Target", level, 10 ** 6)
+            battle = Battle(character, [enemy], IceBlast())
+            skipped = 0
+            for _ in range(5):
+                battle.start_round()
+                turn = battle.queue.pop()
+                while turn:
+                    combatant, side = turn
+                    if side == ENEMIES:
+                        skipped += "freeze" in combatant.status_effects
+                        battle.enemy_turn(combatant)
+                    else:
+                        battle.party_turn(combatant)
+                    turn = battle.queue.pop()
+                battle.queue.next_round()
+            # An enemy that outranks the player acts once before the first freeze lands.
+            assert skipped == expected, level
@@ -0,0 +1,38 @@
+import itertools
+import random
+from catalog import Catalog, generate_items
+from loadout import best_loadout, bonus
+from registry import registry
+
+slots = ["weapon", "armor", "ring"]
+
+def brute_force(char_class, gold, owned, equipment, catalog):
+    # Every combination of keeping the current item or switching to any item per slot.
+    spec = registry.classes[char_class]
+    stat = spec.primary_stat
+    owned_names = {item.name for item in owned}
+    choices = [[equipment.get(slot)] + [item for item in list(catalog) + owned if item.item_type == slot]
+               for slot in slots]
+    best = None
+    for picks in itertools.product(*choices):
+        cost = sum(item.price for item in set(picks) if item and item not in equipment.values() and item.name not in owned_names)
+        if cost <= gold:
+            power = spec.damage_factor * (getattr(spec, stat) + sum(bonus(item, stat) for item in picks))
+            best = power if best is None else max(best, power)
+    return best
+
+def test_best_loadout_matches_brute_force():
+    rng = random.Random(11)
+    for trial in range(60):
+        catalog = Catalog(None)
+        catalog.extend(generate_items(rng.randint(3, 9), seed=trial, slots=slots))
+        owned = generate_items(rng.randint(0, 2), seed=1000 + trial, slots=slots, start=100)
+        equipment = {item.item_type: item for item in generate_items(1, seed=2000 + trial, slots=slots, start=200)}
+        char_class = rng.choice(registry.class_names())
+        gold = rng.randint(0, 200)
+
+        loadout = best_loadout(char_class, gold, owned, equipment, catalog)
+        assert loadout.attack_power == brute_force(char_class, gold, owned, equipment, catalog)
+        assert loadout.cost == sum(item.price for item in loadout.buy) <= gold
+        assert all(item.item_type == slot for slot, item in loadout.equip.items())
+        assert not {item.name for item in loadout.buy} & {item.name for item in owned}
@@ -0,0 +1,68 @@
+import random
+from pathing import DistanceField, Navigator, directions
+from world import World, ChunkedWorld
+
+offsets = {name: (dx, dy) for name, dx, dy in directions}
+
+def brute_force(size, sources, origin=(0, 0)):
+    ox, oy = origin
+    return [[min((abs(x + ox - sx) + abs(y + oy - sy) for sx, sy in sources), default=None)
+             for x in range(size)] for y in range(size)]
+
+def field_grid(field):
+    ox, oy = field.origin
+    return [[field.distance((x + ox, y + oy)) for x in range(field.size)] for y in range(field.size)]
+
+def test_incremental_updates_match_brute_force():
+    rng = random.Random(3)
+    size = 24
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    sources = set(rng.sample(cells, 6))
+    field = DistanceField(size, sources)
+    assert field_grid(field) == brute_force(size, sources)
+    for _ in range(60):
+        if sources and rng.random() < 0.5:
+            position = rng.choice(sorted(sources))
+            sources.discard(position)
+            field.remove(position)
+        else:
+            position = rng.choice(cells)
+            sources.add(position)
+            field.add(position)
+        assert field_grid(field) == brute_force(size, sources)
+
+def test_window_ignores_outside_sources():
+    sources = [(50, 50), (10, 10), (58, 41)]
+    field = DistanceField(21, sources, origin=(40, 40))
+    assert field_grid(field) == brute_force(21, [(50, 50), (58, 41)], (40, 40))
+
+def walk(start, steps):
+    x, y = start
+    for step in steps:
+        x, y = x + offsets[step][0], y + offsets[step][1]
+    return (x, y)
+
+def test_path_reaches_the_nearest_destination():
+    world = World(30)
+    for position in [(2, 3), (20, 25), (28, 1)]:
+        world.place(position, "B")
+    navigator = Navigator(world)
+    steps = navigator.path((18, 20), "boss")
+    assert walk((18, 20), steps) == (20, 25) and len(steps) == 7
+    world.remove((20, 25))
+    navigator.update((20, 25))
+    steps = navigator.path((18, 20), "boss")
+    assert walk((18, 20), steps) == (28, 1) and len(steps) == 29
+
+def test_chunked_travel_and_boss_kill():
+    for map_size in (100, 4096):
+        world = ChunkedWorld(1234, map_size, max_chunks=16)
+        navigator = Navigator(world)
+        center = (map_size // 2, map_size // 2)
+        steps = navigator.path(center, "boss")
+        boss = walk(center, steps)
+        assert world.is_boss(boss)
+        world.remove(boss)
+        navigator.update(boss)
+        following = navigator.path(boss, "boss")
+        assert following is None or (following and world.is_boss(walk(boss, following)))
@@ -0,0 +1,162 @@
+import os
+import pytest
+from catalog import catalog
+from character import Character, Companion
+from events import bus, NullSink
+from save import SaveFile, header, VERSION
+from world import World, ChunkedWorld
+
+@pytest.fixture(autouse=True)
+def quiet():
+    with bus.using(NullSink()):
+        yield
+
+def make_party():
+    player = Character("Ada", "mage")
+    player.position = [3, 7]
+    player.health = 87
+    player.mana = 12.5
+    player.gold = 140
+    player.exp = 6
+    player.inventory.add(catalog.get("Ring of Dexterity"), 3)
+    player.inventory.add(catalog.get("Helmet of Insight"))
+    player.equipment["helmet"] = catalog.get("Helmet of Insight")
+    player.refresh_stats()
+    player.status_effects.apply("poison")
+    player.status_effects.apply("poison")
+    player.status_effects.apply("freeze")
+    companion = Companion("Bogdan", "warrior")
+    companion.health = 41
+    return player, [companion]
+
+def fixed_world():
+    world = World(20)
+    world.place((1, 2), "C")
+    world.place((5, 5), "B")
+    world.place((9, 4), "B")
+    world.add_tavern((1, 2))
+    return world
+
+def state(character):
+    effects = character.status_effects
+    return (character.name, character.char_class, list(character.position), character.level, character.health,
+            character.base_health, character.mana, character.base_mana, character.exp, character.exp_to_next_level,
+            character.gold, sorted(item.name for item in character.inventory),
+            {slot: item.name for slot, item in character.equipment.items() if item},
+            {name: effects.stack_count(name) for name in effects}, character.attack_power)
+
+def test_fixed_world_round_trip(tmp_path):
+    path = str(tmp_path / "save.dat")
+    player, companions = make_party()
+    world = fixed_world()
+    SaveFile(path).save(player, companions, world)
+
+    loaded = SaveFile(path).load()
+    assert state(loaded.player) == state(player)
+    assert [state(companion) for companion in loaded.companions] == [state(companion) for companion in companions]
+    assert loaded.world.map_size == 20
+    assert loaded.world.is_city((1, 2)) and loaded.world.has_tavern((1, 2))
+    assert sorted(loaded.world.bosses) == [(5, 5), (9, 4)]
+
+def test_whole_vitals_stay_ints(tmp_path):
+    path = str(tmp_path / "save.dat")
+    player, companions = make_party()
+    SaveFile(path).save(player, companions, fixed_world())
+    loaded = SaveFile(path).load().player
+    assert type(loaded.health) is int and type(loaded.base_health) is int
+    assert loaded.mana == 12.5
+
+def test_journal_replays_turns_party_changes_and_removals(tmp_path):
+    path = str(tmp_path / "save.dat")
+    player, companions = make_party()
+    world = fixed_world()
+    save = SaveFile(path)
+    save.save(player, companions, world)
+    for step in range(5):
+        player.position[0] += 1
+        player.health -= 3
+        save.autosave(player, companions, world)
+    player.inventory.add(catalog.get("Gloves of Precision"))
+    companions.append(Companion("Krysia", "mage"))
+    save.autosave(player, companions, world)
+    world.remove((5, 5))
+    save.record_removed((5, 5))
+    save.close()
+
+    loaded = SaveFile(path).load()
+    assert state(loaded.player) == state(player)
+    assert [companion.name for companion in loaded.companions] == ["Bogdan", "Krysia"]
+    assert not loaded.world.is_boss((5, 5))
+    assert loaded.world.is_boss((9, 4))
+
+def test_truncated_journal_keeps_complete_records(tmp_path):
+    path = str(tmp_path / "save.dat")
+    player, companions = make_party()
+    world = fixed_world()
+    save = SaveFile(path)
+    save.save(player, companions, world)
+    player.position = [4, 7]
+    save.autosave(player, companions, world)
+    expected = state(player)
+    player.position = [5, 7]
+    save.autosave(player, companions, world)
+    save.close()
+    # Cut the last record short, as a crash in the middle of the write would.
+    with open(save.journal_path, "r+b") as f:
+        f.truncate(os.path.getsize(save.journal_path) - 5)
+
+    assert state(SaveFile(path).load().player) == expected
+
+def test_stale_journal_is_ignored(tmp_path):
+    path = str(tmp_path / "save.dat")
+    player, companions = make_party()
+    world = fixed_world()
+    save = SaveFile(path)
+    save.save(player, companions, world)
+    player.position = [9, 9]
+    save.autosave(player, companions, world)
+    journal = open(save.journal_path, "rb").read()
+    player.position = [3, 7]
+    save.save(player, companions, world)
+    save.close()
+    # A journal from the previous generation next to the new snapshot.
+    with open(save.journal_path, "wb") as f:
+        f.write(journal)
+
+    assert SaveFile(path).load().player.position == [3, 7]
+
+def test_chunked_world_round_trip(tmp_path):
+    path = str(tmp_path / "save.dat")
+    player, companions = make_party()
+    world = ChunkedWorld(1234, 4096, max_chunks=16)
+    center = (2048, 2048)
+    player.position = list(center)
+    boss = world.within(center, 64, "boss")[0]
+    world.remove(boss)
+    save = SaveFile(path)
+    save.save(player, companions, world)
+    other = world.within(center, 64, "boss")[0]
+    world.remove(other)
+    save.record_removed(other)
+    save.close()
+
+    loaded = SaveFile(path).load()
+    assert state(loaded.player) == state(player)
+    restored = loaded.world
+    assert (restored.seed, restored.map_size, restored.chunk_size) == (1234, 4096, world.chunk_size)
+    assert restored.removed == {boss, other}
+    assert not restored.is_boss(boss) and not restored.is_boss(other)
+    fresh = ChunkedWorld(1234, 4096)
+    for x in range(center[0] - 40, center[0] + 40, 3):
+        for y in range(center[1] - 40, center[1] + 40, 3):
+            if (x, y) not in restored.removed:
+                assert restored.tile_at((x, y)) == fresh.tile_at((x, y))
+
+def test_other_versions_are_rejected(tmp_path):
+    path = str(tmp_path / "save.dat")
+    player, companions = make_party()
+    SaveFile(path).save(player, companions, fixed_world())
+    with open(path, "r+b") as f:
+        f.write(header.pack(b"NGSV", VERSION - 1, 1))
+    with pytest.raises(ValueError):
+        SaveFile(path).load()
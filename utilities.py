@@ -1,6 +1,7 @@
 # utilities.py
-import random
 from character import Companion
+from gameio import ask_number, say
+from rng import world_rng
 
 def display_map(character, cities, bosses, map_size):
     map_grid = [["." for _ in range(map_size)] for _ in range(map_size)]
@@ -17,37 +18,27 @@ def display_map(character, cities, bosses, map_size):
     map_grid[y][x] = "P"
 
     for row in map_grid:
-        print(" ".join(row))
+        say(" ".join(row))
 
 def generate_city_names(num_cities):
     return [f"City_{i+1}" for i in range(num_cities)]
 
+def sample_positions(count, map_size):
+    return [(cell % map_size, cell // map_size) for cell in world_rng.sample(range(map_size * map_size), count)]
+
 def generate_cities(num_cities, map_size):
-    cities = []
-    while len(cities) < num_cities:
-        x = random.randint(0, map_size - 1)
-        y = random.randint(0, map_size - 1)
-        if (x, y) not in cities:
-            cities.append((x, y))
-    return cities
+    return sample_positions(num_cities, map_size)
 
 def generate_bosses(num_bosses, map_size):
-    bosses = []
-    while len(bosses) < num_bosses:
-        x = random.randint(0, map_size - 1)
-        y = random.randint(0, map_size - 1)
-        if (x, y) not in bosses:
-            bosses.append((x, y))
-    return bosses
+    return sample_positions(num_bosses, map_size)
 
 def hire_companion():
-    print("Available companions:")
+    say("Available companions:")
     companions = [
         Companion("Bogdan", "warrior"),
         Companion("Krysia", "mage"),
         Companion("Kasztan", "rogue")
     ]
     for i, companion in enumerate(companions):
-        print(f"{i + 1}. {companion.name} - {companion.char_class.capitalize()} - Cost: 50 gold")
-    choice = int(input("Enter the number of the companion to hire: ")) - 1
-    return companions[choice]
+        say(f"{i + 1}. {companion.name} - {companion.char_class.capitalize()} - Cost: 50 gold")
+    return companions[ask_number("Enter the number of the companion to hire: ", len(companions))]
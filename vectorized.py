@@ -0,0 +1,348 @@
+import argparse
+import math
+import time
+import numpy as np
+from character import Character
+from effects import default_rules
+from events import bus, NullSink
+from registry import registry
+from battle import AlwaysAttack, GreedyAbility, ability_chance
+from simulation import RunBelow, run_fights
+
+class_names = registry.class_names()
+effect_names = default_rules.names
+effect_damage = np.array(default_rules.damage, dtype=np.float64)
+effect_duration = np.array(default_rules.duration, dtype=np.int32)
+effect_max_stacks = np.array(default_rules.max_stacks, dtype=np.int32)
+effect_skips = np.array([bool(default_rules.skip_mask >> i & 1) for i in range(len(effect_names))])
+
+# Registry enemy abilities as (level coefficient, roll low, roll high, effect index).
+enemy_abilities = {
+    name: (ability.level_coefficient, ability.low, ability.high,
+           effect_names.index(ability.status_effect) if ability.status_effect else -1)
+    for name, ability in registry.enemy_abilities.items()
+}
+
+def class_tables():
+    tables = {}
+    for char_class in class_names:
+        character = Character("Table", char_class)
+        # Abilities ordered by multiplier so the first eligible one matches GreedyAbility.
+        abilities = sorted(character.abilities.values(), key=lambda ability: -ability["damage_multiplier"])
+        tables[char_class] = {
+            "character": character,
+            "abilities": abilities
+        }
+    return tables
+
+def initial_state(char_class, level):
+    character = Character("Table", char_class)
+    with bus.using(NullSink()):
+        while character.level < level:
+            character.level_up()
+    return character
+
+class Batch:
+    def __init__(self, char_classes, levels, enemy_levels, enemy_abilities_):
+        tables = class_tables()
+        self.size = n = len(levels)
+        char_classes = np.asarray(char_classes)
+        self.cls = np.zeros(n, dtype=np.int8)
+        self.level = np.asarray(levels, dtype=np.int32).copy()
+        self.enemy_level = np.asarray(enemy_levels, dtype=np.int32)
+        self.enemy_health = self.enemy_level * 30.0
+        self.health = np.empty(n)
+        self.mana = np.empty(n)
+        self.base_health = np.empty(n)
+        self.base_mana = np.empty(n)
+        self.exp = np.zeros(n)
+        self.exp_to_next = np.empty(n)
+
+        # Per-class constants live in small tables indexed by `cls`, so only
+        # the mutable fight state has to be carried per row.
+        k = len(class_names)
+        # Classes may have different numbers of abilities; padding columns
+        # need an unreachable level so they are never eligible.
+        width = max(len(tables[char_class]["abilities"]) for char_class in class_names)
+        self.health_per_level = np.zeros(k)
+        self.mana_per_level = np.zeros(k)
+        self.attack_power = np.zeros(k)
+        self.ability_power = np.zeros(k)
+        self.initiative = np.zeros(k)
+        self.ability_level = np.full((k, width), np.inf)
+        self.ability_cost = np.zeros((k, width))
+        self.ability_mult = np.zeros((k, width))
+        self.ability_effect = np.full((k, width), -1, dtype=np.int8)
+        for c, char_class in enumerate(class_names):
+            table = tables[char_class]
+            character = table["character"]
+            self.health_per_level[c] = character.health_per_level
+            self.mana_per_level[c] = character.mana_per_level
+            self.attack_power[c] = character.attack_power
+            self.ability_power[c] = character.ability_power
+            self.initiative[c] = character.initiative()
+            for j, ability in enumerate(table["abilities"]):
+                self.ability_level[c, j] = ability["level"]
+                self.ability_cost[c, j] = ability["mana_cost"]
+                self.ability_mult[c, j] = ability["damage_multiplier"]
+                if ability["status_effect"] in effect_names:
+                    self.ability_effect[c, j] = effect_names.index(ability["status_effect"])
+
+            class_rows = char_classes == char_class
+            self.cls[class_rows] = c
+            for level in np.unique(self.level[class_rows]):
+                rows = class_rows & (self.level == level)
+                character = initial_state(char_class, int(level))
+                self.health[rows] = character.health
+                self.mana[rows] = character.mana
+                self.base_health[rows] = character.base_health
+                self.base_mana[rows] = character.base_mana
+                self.exp[rows] = character.exp
+                self.exp_to_next[rows] = character.exp_to_next_level
+
+        # Index 0 is "no ability"; it still takes the ability branch for a 0 damage hit.
+        ability_names = [None] + sorted(enemy_abilities)
+        self.enemy_has_ability = np.zeros(n, dtype=bool)
+        self.enemy_ability = np.zeros(n, dtype=np.int8)
+        self.enemy_coef = np.zeros(len(ability_names))
+        self.enemy_low = np.zeros(len(ability_names), dtype=np.int64)
+        self.enemy_high = np.zeros(len(ability_names), dtype=np.int64)
+        self.enemy_effect = np.full(len(ability_names), -1, dtype=np.int8)
+        enemy_abilities_ = np.asarray(enemy_abilities_)
+        self.enemy_has_ability[:] = enemy_abilities_ != ""
+        for i, ability in enumerate(ability_names[1:], 1):
+            self.enemy_ability[enemy_abilities_ == ability] = i
+            self.enemy_coef[i], self.enemy_low[i], self.enemy_high[i], self.enemy_effect[i] = enemy_abilities[ability]
+
+        # Stack and duration counters per effect, as kept by StatusEffects.
+        e = len(effect_names)
+        self.player_stacks = np.zeros((n, e), dtype=np.int32)
+        self.player_durations = np.zeros((n, e), dtype=np.int32)
+        self.enemy_stacks = np.zeros((n, e), dtype=np.int32)
+        self.enemy_durations = np.zeros((n, e), dtype=np.int32)
+        self.turns = np.zeros(n, dtype=np.int32)
+        self.ids = np.arange(n)
+
+    row_fields = ("cls", "level", "enemy_level", "enemy_health", "health", "mana", "base_health", "base_mana",
+                  "exp", "exp_to_next", "enemy_has_ability", "enemy_ability", "player_stacks", "player_durations",
+                  "enemy_stacks", "enemy_durations", "turns", "ids")
+
+    def compact(self, keep):
+        for name in self.row_fields:
+            setattr(self, name, getattr(self, name)[keep])
+
+def tick(stacks, durations):
+    # StatusEffects.tick for every row: damage from current stacks, then
+    # expiry of everything but the turn-skipping effects.
+    damage = stacks @ effect_damage
+    active = (durations > 0) & ~effect_skips
+    durations -= active
+    stacks[active & (durations <= 0)] = 0
+    return damage
+
+def skip_turn(stacks, durations, rows):
+    # StatusEffects.skip_turn for the selected rows: returns the rows whose
+    # turn is skipped and uses up one turn of their first skipping effect.
+    skipping = (durations > 0) & effect_skips
+    skipped = rows & skipping.any(axis=1)
+    index = np.flatnonzero(skipped)
+    if len(index):
+        first = skipping[index].argmax(axis=1)
+        durations[index, first] -= 1
+        expired = durations[index, first] <= 0
+        stacks[index[expired], first[expired]] = 0
+    return skipped
+
+def apply(stacks, durations, effect, rows):
+    # StatusEffects.apply for one effect on the selected rows.
+    if not rows.any():
+        return
+    stacking = default_rules.stacking[effect]
+    active = durations[:, effect] > 0
+    if stacking == "ignore":
+        rows = rows & ~active
+    if stacking == "stack":
+        stacks[rows, effect] = np.minimum(np.where(active[rows], stacks[rows, effect] + 1, 1), effect_max_stacks[effect])
+    else:
+        stacks[rows, effect] = 1
+    durations[rows, effect] = effect_duration[effect]
+
+def gain_exp(b, rows):
+    # gain_exp on a kill levels up at most once, restoring health and mana.
+    cls = b.cls
+    b.exp += np.where(rows, b.enemy_level * 5, 0)
+    level_up = rows & (b.exp >= b.exp_to_next)
+    b.level += level_up
+    b.exp -= np.where(level_up, b.exp_to_next, 0)
+    b.exp_to_next = np.where(level_up, np.floor(b.exp_to_next * 1.5), b.exp_to_next)
+    b.base_health += np.where(level_up, b.health_per_level[cls] * b.level, 0)
+    b.base_mana += np.where(level_up, b.mana_per_level[cls] * b.level, 0)
+    b.health = np.where(level_up, b.base_health, b.health)
+    b.mana = np.where(level_up, b.base_mana, b.mana)
+
+def enemy_act(b, rows, rng):
+    # The enemy's turn on the selected rows, unless an effect skips it.
+    m = len(rows)
+    acting = rows & ~skip_turn(b.enemy_stacks, b.enemy_durations, rows)
+    special = acting & b.enemy_has_ability & (rng.random(m) < ability_chance)
+    normal = acting & ~special
+    ability = b.enemy_ability
+    special_damage = b.enemy_level * b.enemy_coef[ability] + rng.integers(b.enemy_low[ability], b.enemy_high[ability] + 1)
+    normal_damage = rng.integers(5, 16, m) * b.enemy_level
+    b.health -= np.where(special, special_damage, np.where(normal, normal_damage, 0))
+    for effect in range(len(effect_names)):
+        apply(b.player_stacks, b.player_durations, effect, special & (b.enemy_effect[ability] == effect))
+
+def run(batch, policy="attack", run_below=30, seed=0, max_turns=10000):
+    rng = np.random.default_rng(seed)
+    n = batch.size
+    outcome = np.zeros(n, dtype=np.int8)  # 0 lost, 1 won, 2 fled
+    turns = np.zeros(n, dtype=np.int32)
+    health = np.zeros(n)
+    rounds = 0
+    b = batch
+    live = np.ones(n, dtype=bool)
+    live_count = n
+
+    for _ in range(max_turns):
+        if not live_count:
+            break
+        m = len(b.ids)
+        rounds += live_count
+        # process_status_effects for the player, then for the enemy. Rows of
+        # finished fights keep ticking until the next compaction but are never
+        # read again. Deaths from effects resolve before anyone acts, the
+        # player's first.
+        b.health -= tick(b.player_stacks, b.player_durations)
+        b.enemy_health -= tick(b.enemy_stacks, b.enemy_durations)
+        died = live & (b.health <= 0)
+        ticked_out = live & ~died & (b.enemy_health <= 0)
+        gain_exp(b, ticked_out)
+        fighting = live & ~died & ~ticked_out
+
+        # Battle turn order: an enemy whose level beats the player's agility acts first.
+        cls = b.cls
+        enemy_first = b.enemy_level > b.initiative[cls]
+        enemy_act(b, fighting & enemy_first, rng)
+
+        player_turn = fighting & (b.health > 0)
+        player_turn &= ~skip_turn(b.player_stacks, b.player_durations, player_turn)
+        b.turns += player_turn
+        if policy == "attack":
+            choice = np.full(m, -1)
+        else:
+            eligible = (b.level[:, None] >= b.ability_level[cls]) & (b.mana[:, None] >= b.ability_cost[cls])
+            choice = np.where(eligible.any(axis=1), eligible.argmax(axis=1), -1)
+        fled = player_turn & (b.health < run_below) if policy == "run" else np.zeros(m, dtype=bool)
+
+        acting = player_turn & ~fled
+        use_ability = acting & (choice >= 0)
+        attack = acting & (choice < 0)
+        safe_choice = np.maximum(choice, 0)
+        b.mana -= np.where(use_ability, b.ability_cost[cls, safe_choice], 0)
+        ability_damage = b.ability_power[cls] * b.ability_mult[cls, safe_choice] + rng.integers(10, 21, m)
+        attack_damage = rng.integers(5, 16, m) + b.attack_power[cls]
+        b.enemy_health -= np.where(use_ability, ability_damage, np.where(attack, attack_damage, 0))
+        applied = np.where(use_ability, b.ability_effect[cls, safe_choice], -1)
+        for effect in range(len(effect_names)):
+            apply(b.enemy_stacks, b.enemy_durations, effect, applied == effect)
+
+        killed = acting & (b.enemy_health <= 0)
+        gain_exp(b, killed)
+        enemy_act(b, acting & ~enemy_first & ~killed, rng)
+
+        killed |= ticked_out
+        done = died | fled | killed | (fighting & (b.health <= 0))
+        if done.any():
+            ids = b.ids[done]
+            outcome[ids] = np.where(fled[done], 2, np.where(b.health[done] > 0, 1, 0))
+            turns[ids] = b.turns[done]
+            health[ids] = b.health[done]
+            live &= ~done
+            live_count = int(live.sum())
+            if live_count < m // 2:
+                b.compact(live)
+                live = live[live]
+
+    return {"outcome": outcome, "turns": turns, "health": health, "rounds": rounds}
+
+def summarize(result, hp_bucket=10):
+    outcome, turns, health = result["outcome"], result["turns"], result["health"]
+    names = np.array(["lost", "won", "fled"])
+    values, counts = np.unique(outcome, return_counts=True)
+    won = outcome == 1
+    turn_values, turn_counts = np.unique(turns[won], return_counts=True)
+    buckets = np.maximum(0, health.astype(np.int64)) // hp_bucket * hp_bucket
+    hp_values, hp_counts = np.unique(buckets, return_counts=True)
+    return {
+        "fights": len(outcome),
+        "win_rate": float(won.mean()) if len(outcome) else 0.0,
+        "outcomes": {str(names[v]): int(c) for v, c in zip(values, counts)},
+        "turns_to_kill": {int(v): int(c) for v, c in zip(turn_values, turn_counts)},
+        "hp_remaining": {int(v): int(c) for v, c in zip(hp_values, hp_counts)}
+    }
+
+def simulate(num_fights, char_class="warrior", level=1, enemy_level=1, enemy_ability="Savage Bite", policy="attack", run_below=30, seed=0):
+    batch = Batch(np.full(num_fights, char_class), np.full(num_fights, level), np.full(num_fights, enemy_level),
+                  np.full(num_fights, enemy_ability or ""))
+    return run(batch, policy, run_below, seed)
+
+def _mean_and_var(histogram):
+    total = sum(histogram.values())
+    mean = sum(k * v for k, v in histogram.items()) / total
+    var = sum((k - mean) ** 2 * v for k, v in histogram.items()) / max(1, total - 1)
+    return mean, var, total
+
+def cross_check(num_fights=20000, char_class="warrior", level=1, enemy_level=2, enemy_ability="Savage Bite", policy="attack", run_below=30, seed=0, z_limit=4.0):
+    # Compares the vectorized engine with simulation.run_fights: win rate by a
+    # two-proportion z-test and mean turns-to-kill by Welch's t statistic.
+    scalar_policy = {"attack": AlwaysAttack(), "greedy": GreedyAbility(), "run": RunBelow(run_below)}[policy]
+    scalar = run_fights(num_fights, char_class, level, scalar_policy, seed,
+                        enemy_spec=[("Enemy", enemy_level, enemy_ability)]).summary()
+    vector = summarize(simulate(num_fights, char_class, level, enemy_level, enemy_ability, policy, run_below, seed))
+
+    p1, p2 = scalar["win_rate"], vector["win_rate"]
+    pooled = (p1 + p2) / 2
+    se = math.sqrt(max(pooled * (1 - pooled) * 2 / num_fights, 1e-12))
+    win_z = (p1 - p2) / se
+    turns_z = 0.0
+    if scalar["turns_to_kill"] and vector["turns_to_kill"]:
+        m1, v1, n1 = _mean_and_var(scalar["turns_to_kill"])
+        m2, v2, n2 = _mean_and_var(vector["turns_to_kill"])
+        turns_z = (m1 - m2) / math.sqrt(max(v1 / n1 + v2 / n2, 1e-12))
+    return {
+        "scalar": scalar,
+        "vectorized": vector,
+        "win_rate_z": win_z,
+        "turns_z": turns_z,
+        "equivalent": abs(win_z) < z_limit and abs(turns_z) < z_limit
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized Monte Carlo combat engine.")
+    parser.add_argument("-n", "--fights", type=int, default=1000000)
+    parser.add_argument("-c", "--char-class", default="warrior")
+    parser.add_argument("-l", "--level", type=int, default=1)
+    parser.add_argument("-e", "--enemy-level", type=int, default=2)
+    parser.add_argument("-a", "--enemy-ability", default="Savage Bite")
+    parser.add_argument("-p", "--policy", choices=["attack", "greedy", "run"], default="attack")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="cross-check against the scalar simulator")
+    args = parser.parse_args()
+
+    if args.check:
+        report = cross_check(min(args.fights, 20000), args.char_class, args.level, args.enemy_level,
+                             args.enemy_ability, args.policy, seed=args.seed)
+        print(f"Scalar win rate: {report['scalar']['win_rate']:.4f}  Vectorized win rate: {report['vectorized']['win_rate']:.4f}")
+        print(f"Win rate z: {report['win_rate_z']:.2f}  Turns z: {report['turns_z']:.2f}  Equivalent: {report['equivalent']}")
+        return
+
+    start = time.perf_counter()
+    result = simulate(args.fights, args.char_class, args.level, args.enemy_level, args.enemy_ability, args.policy, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    summary = summarize(result)
+    print(f"Fights: {summary['fights']}  Win rate: {summary['win_rate']:.4f}  Outcomes: {summary['outcomes']}")
+    print(f"Rounds: {result['rounds']}  Time: {elapsed:.2f}s  Rounds/s: {result['rounds'] / elapsed:,.0f}")
+
+if __name__ == "__main__":
+    main()
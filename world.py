@@ -0,0 +1,264 @@
+import hashlib
+import random
+import struct
+from collections import OrderedDict
+from rng import world_rng
+
+CITY = "C"
+BOSS = "B"
+
+# Default side of a ChunkedWorld; positions still fit the save format's 32-bit fields.
+unbounded_map_size = 1 << 24
+
+class World:
+    # Points of interest keyed by coordinate for O(1) tile lookups, plus a
+    # coarse bucket grid per kind ("city", "tavern", "boss") for radius and
+    # nearest queries. Distances are Manhattan, matching 4-way movement.
+    def __init__(self, map_size, bucket_size=16):
+        self.map_size = map_size
+        self.bucket_size = bucket_size
+        self.tiles = {}
+        self.taverns = set()
+        self.buckets = {"city": {}, "tavern": {}, "boss": {}}
+        self.counts = {"city": 0, "tavern": 0, "boss": 0}
+        self.cities = []
+        self.bosses = []
+
+    @classmethod
+    def generate(cls, map_size, num_cities, num_bosses, rng=world_rng, **kwargs):
+        world = cls(map_size, **kwargs)
+        # Sampling cell indices without replacement keeps every point of
+        # interest on its own tile without any rejection loop.
+        cells = rng.sample(range(map_size * map_size), num_cities + num_bosses)
+        for i, cell in enumerate(cells):
+            position = (cell % map_size, cell // map_size)
+            world.place(position, CITY if i < num_cities else BOSS)
+        for position in rng.sample(world.cities, len(world.cities) // 2):
+            world.add_tavern(position)
+        return world
+
+    def bucket(self, position):
+        return (position[0] // self.bucket_size, position[1] // self.bucket_size)
+
+    def _index(self, kind, position):
+        self.buckets[kind].setdefault(self.bucket(position), set()).add(position)
+        self.counts[kind] += 1
+
+    def _unindex(self, kind, position):
+        bucket = self.buckets[kind].get(self.bucket(position))
+        if bucket and position in bucket:
+            bucket.discard(position)
+            self.counts[kind] -= 1
+
+    def place(self, position, tile):
+        position = tuple(position)
+        if position in self.tiles:
+            raise ValueError(f"Tile {position} is already occupied.")
+        self.tiles[position] = tile
+        if tile == CITY:
+            self.cities.append(position)
+            self._index("city", position)
+        elif tile == BOSS:
+            self.bosses.append(position)
+            self._index("boss", position)
+
+    def add_tavern(self, position):
+        position = tuple(position)
+        if self.tiles.get(position) != CITY:
+            raise ValueError(f"There is no city at {position}.")
+        if position not in self.taverns:
+            self.taverns.add(position)
+            self._index("tavern", position)
+
+    def remove(self, position):
+        position = tuple(position)
+        tile = self.tiles.pop(position, None)
+        if tile == CITY:
+            self.cities.remove(position)
+            self._unindex("city", position)
+            if position in self.taverns:
+                self.taverns.discard(position)
+                self._unindex("tavern", position)
+        elif tile == BOSS:
+            self.bosses.remove(position)
+            self._unindex("boss", position)
+        return tile
+
+    def tile_at(self, position):
+        return self.tiles.get(tuple(position))
+
+    def is_city(self, position):
+        return self.tiles.get(tuple(position)) == CITY
+
+    def is_boss(self, position):
+        return self.tiles.get(tuple(position)) == BOSS
+
+    def has_tavern(self, position):
+        return tuple(position) in self.taverns
+
+    def within(self, position, radius, kind="city"):
+        x, y = position
+        bx0, by0 = self.bucket((x - radius, y - radius))
+        bx1, by1 = self.bucket((x + radius, y + radius))
+        buckets = self.buckets[kind]
+        found = []
+        for bx in range(bx0, bx1 + 1):
+            for by in range(by0, by1 + 1):
+                for px, py in buckets.get((bx, by), ()):
+                    if abs(px - x) + abs(py - y) <= radius:
+                        found.append((px, py))
+        return found
+
+    def nearest(self, position, kind="city"):
+        if not self.counts[kind]:
+            return None
+        x, y = position
+        cx, cy = self.bucket(position)
+        buckets = self.buckets[kind]
+        max_ring = self.map_size // self.bucket_size + 1
+        best, best_distance = None, None
+        for ring in range(max_ring + 1):
+            # Everything in ring r is at least (r - 1) * bucket_size + 1 away.
+            if best is not None and best_distance <= ring * self.bucket_size - self.bucket_size:
+                break
+            for key in ring_buckets(cx, cy, ring):
+                for px, py in buckets.get(key, ()):
+                    distance = abs(px - x) + abs(py - y)
+                    if best is None or distance < best_distance or (distance == best_distance and (px, py) < best):
+                        best, best_distance = (px, py), distance
+        return best
+
+def ring_buckets(cx, cy, ring):
+    if ring == 0:
+        yield (cx, cy)
+        return
+    for bx in range(cx - ring, cx + ring + 1):
+        yield (bx, cy - ring)
+        yield (bx, cy + ring)
+    for by in range(cy - ring + 1, cy + ring):
+        yield (cx - ring, by)
+        yield (cx + ring, by)
+
+class Chunk:
+    __slots__ = ("tiles", "taverns", "level")
+
+    def __init__(self, level):
+        self.tiles = {}
+        self.taverns = set()
+        self.level = level
+
+class ChunkedWorld:
+    # A world too large to hold in memory. The map is cut into
+    # chunk_size x chunk_size chunks whose cities, taverns, bosses and
+    # difficulty level are derived from a hash of (seed, chunk coordinates)
+    # when first touched, so startup cost and memory do not depend on
+    # map_size and an evicted chunk comes back identical. At most
+    # `max_chunks` chunks stay resident (least recently used go first);
+    # the only other state is the set of removed tiles, e.g. defeated bosses.
+    def __init__(self, seed, map_size=unbounded_map_size, chunk_size=16, max_chunks=256, city_density=0.025, boss_density=0.0125):
+        self.seed = seed
+        self.map_size = map_size
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.city_density = city_density
+        self.boss_density = boss_density
+        self.chunks = OrderedDict()
+        self.removed = set()
+        # Neighbouring lookups mostly hit the same chunk; it is already the
+        # most recently used, so it can skip the LRU bookkeeping.
+        self.last_key = None
+        self.last_chunk = None
+
+    @classmethod
+    def generate(cls, map_size=unbounded_map_size, rng=world_rng, **kwargs):
+        return cls(rng.getrandbits(64), map_size, **kwargs)
+
+    def chunk_key(self, position):
+        return (position[0] // self.chunk_size, position[1] // self.chunk_size)
+
+    def chunk(self, key):
+        if key == self.last_key:
+            return self.last_chunk
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = self.build_chunk(key)
+            if len(self.chunks) > self.max_chunks:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+        self.last_key = key
+        self.last_chunk = chunk
+        return chunk
+
+    def build_chunk(self, key):
+        cx, cy = key
+        size = self.chunk_size
+        digest = hashlib.blake2b(struct.pack("<QqqQ", self.seed, cx, cy, size), digest_size=8).digest()
+        rng = random.Random(int.from_bytes(digest, "little"))
+        # Difficulty rises by one level per ring of chunks around the middle of the map.
+        mx, my = self.chunk_key((self.map_size // 2, self.map_size // 2))
+        chunk = Chunk(max(abs(cx - mx), abs(cy - my)))
+        x0, y0 = cx * size, cy * size
+        width = max(0, min(size, self.map_size - x0))
+        height = max(0, min(size, self.map_size - y0))
+        if not width or not height:
+            return chunk
+        cells = width * height
+        num_cities = rng.randint(0, round(2 * self.city_density * cells))
+        num_bosses = rng.randint(0, round(2 * self.boss_density * cells))
+        cities = []
+        for i, cell in enumerate(rng.sample(range(cells), min(cells, num_cities + num_bosses))):
+            position = (x0 + cell % width, y0 + cell // width)
+            if i < num_cities:
+                cities.append(position)
+            if position not in self.removed:
+                chunk.tiles[position] = CITY if i < num_cities else BOSS
+        for position in rng.sample(cities, len(cities) // 2):
+            if position not in self.removed:
+                chunk.taverns.add(position)
+        return chunk
+
+    def zone_at(self, position):
+        return self.chunk(self.chunk_key(position)).level
+
+    def tile_at(self, position):
+        x, y = position
+        key = (x // self.chunk_size, y // self.chunk_size)
+        chunk = self.last_chunk if key == self.last_key else self.chunk(key)
+        return chunk.tiles.get((x, y))
+
+    def is_city(self, position):
+        return self.tile_at(position) == CITY
+
+    def is_boss(self, position):
+        return self.tile_at(position) == BOSS
+
+    def has_tavern(self, position):
+        return tuple(position) in self.chunk(self.chunk_key(position)).taverns
+
+    def remove(self, position):
+        position = tuple(position)
+        chunk = self.chunk(self.chunk_key(position))
+        tile = chunk.tiles.pop(position, None)
+        if tile is not None:
+            chunk.taverns.discard(position)
+            self.removed.add(position)
+        return tile
+
+    def within(self, position, radius, kind="city"):
+        x, y = position
+        cx0, cy0 = self.chunk_key((max(0, x - radius), max(0, y - radius)))
+        cx1, cy1 = self.chunk_key((min(self.map_size - 1, x + radius), min(self.map_size - 1, y + radius)))
+        found = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                chunk = self.chunk((cx, cy))
+                if kind == "tavern":
+                    candidates = chunk.taverns
+                else:
+                    tile = CITY if kind == "city" else BOSS
+                    candidates = [p for p, t in chunk.tiles.items() if t == tile]
+                for px, py in candidates:
+                    if abs(px - x) + abs(py - y) <= radius:
+                        found.append((px, py))
+        return found